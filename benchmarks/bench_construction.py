@@ -0,0 +1,52 @@
+"""
+Benchmark of QDataFrame construction without query execution.
+
+Times copying of query and a pipeline of selection, renaming,
+arithmetic, filtering and limit compiled to SQL on the sample database.
+
+Usage:
+    python benchmarks/bench_construction.py [number]
+
+Copyright 2020 Ilia Lazarev
+Licensed under the Apache License, Version 2.0
+"""
+
+import os
+import sqlite3
+import sys
+import timeit
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from nopandas.sqlite import Schema  # noqa: E402
+
+
+PATH_TO_SQLITE_DUMP = os.path.join(
+    os.path.dirname(os.path.abspath(__file__)),
+    '..', 'tests', 'assets', 'chinook.db'
+)
+
+
+def pipeline(tracks):
+    """Build query of long tracks and compile it."""
+    qdf = tracks[['TrackId', 'Name', 'Milliseconds', 'UnitPrice']]
+    qdf = qdf.rename({'Name': 'title'})
+    length = qdf['Milliseconds'] + 1000
+    qdf = qdf[length > 300000]
+    return qdf.iloc[:100].query()
+
+
+def main(number=10000):
+    """Print average time of each case in microseconds."""
+    tracks = Schema(sqlite3.connect(PATH_TO_SQLITE_DUMP))['tracks']
+    cases = [
+        ('copy_with()', lambda: tracks.copy_with()),
+        ('pipeline + query()', lambda: pipeline(tracks)),
+    ]
+    for name, case in cases:
+        best = min(timeit.repeat(case, number=number, repeat=5))
+        print('%-20s %8.1f us' % (name, best / number * 1e6))
+
+
+if __name__ == '__main__':
+    main(*map(int, sys.argv[1:]))
@@ -9,17 +9,49 @@ Copyright 2020 Ilia Lazarev
 Licensed under the Apache License, Version 2.0
 """
 
+import base64
+import csv
+import json
+import math
+import operator
+import os
+import random
+import re
+import sys
 from collections import OrderedDict
-from itertools import chain, product
+from functools import lru_cache
+from itertools import chain, islice, product
 from contextlib import contextmanager
 
-from .tools import Table
+from .tools import (
+    Column,
+    Estimate,
+    ResultSize,
+    Table,
+    chunked,
+    infer_type,
+    open_text,
+)
+
+
+_INHERITORS = {}
 
 
 def _inheritor(supercls, label):
     """Return inheritor class of super class by label."""
-    return next(cls for cls in supercls.__subclasses__()
-                if label in [cls.ID, cls.MODULE])
+    try:
+        return _INHERITORS[supercls, label]
+    except KeyError:
+        raise ValueError('%s has no inheritor for %r' %
+                         (supercls.__name__, label)) from None
+
+
+@lru_cache(maxsize=None)
+def _slots(cls):
+    """Return pairs of slot and parameter names of class and its parents."""
+    slots = chain.from_iterable(getattr(base, '__slots__', ())
+                                for base in cls.__mro__)
+    return tuple((slot, slot.strip('_')) for slot in slots)
 
 
 class RdbmsMixin:
@@ -30,19 +62,43 @@ class RdbmsMixin:
         ID (str) is a unique name of database, maybe equal to MODULE.
         MODULE (str) is module name of supported connection class.
             See 'connection.__class__.__module__'
+        PLACEHOLDER (str) is parameter marker of query.
+            See 'paramstyle' of DB-API module.
+        ROWID (str) is name of implicit integer key of table rows if any.
 
     """
 
     ID = None
     MODULE = None
+    PLACEHOLDER = None
+    ROWID = None
 
     __slots__ = ()
 
+    def __init_subclass__(cls, **kwargs):
+        """Register class as inheritor of its bases by ID and MODULE."""
+        super().__init_subclass__(**kwargs)
+        for base in cls.__bases__:
+            for label in (cls.ID, cls.MODULE):
+                if label is not None:
+                    _INHERITORS.setdefault((base, label), cls)
+
 
 class _Schema(RdbmsMixin):
     """Schema of database."""
 
-    __slots__ = ('_conn', '_alias_generator')
+    __slots__ = (
+        '_conn',
+        '_alias_generator',
+        '_functions',
+        '_session',
+        '_max_result_bytes',
+        '_large_result',
+    )
+
+    BATCH_SIZE = 10000
+
+    TYPES = {int: 'INTEGER', float: 'REAL', str: 'TEXT'}
 
     @staticmethod
     def alias_generator():
@@ -52,28 +108,296 @@ class _Schema(RdbmsMixin):
             for i in range(26)
         )
 
-    def __init__(self, conn):
+    def new_alias(self, taken=()):
+        """Return first alias of 'alias_generator' which is not taken."""
+        return next(alias for alias in self.alias_generator()
+                    if alias not in taken)
+
+    # Number of table rows to measure average size of values.
+    WIDTH_SAMPLE = 100
+
+    LARGE_RESULTS = ('raise', 'stream')
+
+    def __init__(self, conn, max_result_bytes=None, large_result='raise'):
         """
         Get schema of DB by connection.
 
         Args:
             conn (Connection): connection based on python DB-API.
+            max_result_bytes (int): memory budget of fetched result,
+                see 'QDataFrame.estimate'; default no budget.
+            large_result ({'raise', 'stream'}): refuse to fetch result
+                over budget or return iterator of its rows.
 
         """
         self._conn = conn
+        self._functions = {}
+        self._session = None
+        self.max_result_bytes = max_result_bytes
+        self.large_result = large_result
+
+    @property
+    def max_result_bytes(self):
+        """Return memory budget of fetched result or None."""
+        return self._max_result_bytes
+
+    @max_result_bytes.setter
+    def max_result_bytes(self, value):
+        self._max_result_bytes = value
+
+    @property
+    def large_result(self):
+        """Return behavior of fetching result over budget."""
+        return self._large_result
+
+    @large_result.setter
+    def large_result(self, value):
+        if value not in self.LARGE_RESULTS:
+            raise ValueError('unknown behavior: %r' % value)
+
+        self._large_result = value
+
+    def _fetch_result(self, query):
+        """
+        Return fetched rows of query within memory budget.
+
+        Result over budget is refused or streamed by 'iterrows'.
+        """
+        if self._max_result_bytes is not None:
+            rows, size = query.estimate()
+            if size is not None and size > self._max_result_bytes:
+                if self._large_result == 'raise':
+                    raise ValueError(
+                        'estimated result of %d rows (%d bytes) exceeds'
+                        ' max_result_bytes=%d' % (rows, size,
+                                                  self._max_result_bytes)
+                    )
+
+                return self.iterrows(query.query())
+
+        return self.fetchall(query.query())
 
     @contextmanager
     def cursor(self):
         """Get cursor."""
         cursor = self._conn.cursor()
-        yield cursor
-        cursor.close()
+        try:
+            yield cursor
+        finally:
+            cursor.close()
+
+    @contextmanager
+    def transaction(self):
+        """
+        Get cursor which statements are committed together or rollback.
+
+        Transaction is started explicitly, so definitions of tables
+        are rolled back together with inserted rows.
+        """
+        if self._session is not None:
+            raise ValueError('writes are not allowed in read session')
+
+        with self.cursor() as cursor:
+            cursor.execute('BEGIN;')
+            try:
+                yield cursor
+            except BaseException:
+                self._conn.rollback()
+                raise
 
-    def fetchall(self, query):
-        """Return fetched rows for 'query'."""
+            self._conn.commit()
+
+    def fetchall(self, query, cache=False):
+        """
+        Return fetched rows for 'query'.
+
+        Args:
+            query (str): SQL query.
+            cache (bool): reuse rows of same query within read session,
+                e.g. catalog and counts.
+
+        """
+        if cache and self._session is not None and query in self._session:
+            return self._session[query]
+
+        with self.cursor() as cursor:
+            cursor.execute(query)
+            rows = cursor.fetchall()
+
+        if cache and self._session is not None:
+            self._session[query] = rows
+
+        return rows
+
+    @contextmanager
+    def read_session(self):
+        """
+        Evaluate queries inside one read transaction.
+
+        All queries of the session see the same snapshot of database,
+        locks are taken once, and catalog and counts are fetched once.
+        Nested sessions are joined to the outer one. Session is read-only:
+        writes by schema are refused and other changes are rolled back.
+        """
+        if self._session is not None:
+            yield self
+            return
+
+        with self.cursor() as cursor:
+            cursor.execute('BEGIN;')
+
+        self._session = {}
+        try:
+            self._begin_snapshot()
+            yield self
+
+        finally:
+            self._session = None
+            self._conn.rollback()
+
+    def _begin_snapshot(self):
+        """Start reading in transaction to fix the snapshot."""
+
+    def iterrows(self, query, batch_size=None):
+        """
+        Yield rows of 'query' fetched by batches.
+
+        Args:
+            query (str): SQL query.
+            batch_size (int): number of rows fetched at once;
+                default 'BATCH_SIZE'.
+
+        """
         with self.cursor() as cursor:
             cursor.execute(query)
-            return cursor.fetchall()
+            while True:
+                rows = cursor.fetchmany(batch_size or self.BATCH_SIZE)
+                if not rows:
+                    break
+
+                yield from rows
+
+    def _prepare_table(self, cursor, name, if_exists):
+        """
+        Resolve conflict with existing table before writing.
+
+        Args:
+            cursor (Cursor): cursor of opened transaction.
+            name (str): table name.
+            if_exists ({'fail', 'replace', 'append'}): behavior if table
+                already exists.
+
+        Return:
+            bool: True if table exists and rows should be appended.
+
+        """
+        if if_exists not in ('fail', 'replace', 'append'):
+            raise ValueError('unknown if_exists value: %r' % if_exists)
+
+        if name not in self.tables:
+            return False
+
+        if if_exists == 'fail':
+            raise ValueError('table %r already exists' % name)
+
+        if if_exists == 'replace':
+            cursor.execute('DROP TABLE %s;' % name)
+            return False
+
+        return True
+
+    def _insert_many(self, cursor, name, columns, rows, batch_size=None):
+        """Insert rows into table by batches with 'executemany'."""
+        query = 'INSERT INTO %s (%s) VALUES (%s);' % (
+            name,
+            ', '.join(columns),
+            ', '.join([self.PLACEHOLDER] * len(columns))
+        )
+        for batch in chunked(rows, batch_size or self.BATCH_SIZE):
+            cursor.executemany(query, batch)
+
+    def from_records(self, name, rows, columns, types=None,
+                     if_exists='fail', batch_size=None):
+        """
+        Write records to table in a single transaction.
+
+        Args:
+            name (str): table name.
+            rows (iterable of sequences): records to write.
+            columns (list of str): column names.
+            types (list of str, optional): declared types of columns.
+            if_exists ({'fail', 'replace', 'append'}): behavior if table
+                already exists; default 'fail'.
+            batch_size (int): number of rows passed to 'executemany' at once;
+                default 'BATCH_SIZE'.
+
+        Return:
+            QDataFrame: written table.
+
+        """
+        types = types or [''] * len(columns)
+        with self.transaction() as cursor:
+            if not self._prepare_table(cursor, name, if_exists):
+                cursor.execute('CREATE TABLE %s (%s);' % (
+                    name,
+                    ', '.join(('%s %s' % column).strip()
+                              for column in zip(columns, types))
+                ))
+
+            self._insert_many(cursor, name, columns, rows, batch_size)
+
+        return self[name]
+
+    @contextmanager
+    def _bulk_load(self):
+        """Tune connection for the duration of bulk loading."""
+        yield
+
+    def read_csv(self, path_or_file, table=None, sep=',', sample_size=1000,
+                 if_exists='fail', compression='infer', batch_size=None):
+        """
+        Load CSV file with header into table.
+
+        Types of columns are inferred from first 'sample_size' rows,
+        empty fields are loaded as NULL. Rows are streamed from file
+        and inserted by batches in a single transaction.
+
+        Args:
+            path_or_file (str or file-like object): source file.
+            table (str): target table name; default file name
+                without extensions.
+            sep (str): field delimiter; default ','.
+            sample_size (int): number of rows to infer column types.
+            if_exists ({'fail', 'replace', 'append'}): behavior if table
+                already exists; default 'fail'.
+            compression ({'infer', 'gzip', 'bz2', 'xz', None}): compression
+                of file; 'infer' detects it by path extension.
+            batch_size (int): number of rows inserted at once.
+
+        Return:
+            QDataFrame: loaded table.
+
+        """
+        if table is None:
+            if not isinstance(path_or_file, (str, os.PathLike)):
+                raise ValueError('table name is required for file object')
+
+            table = os.path.basename(str(path_or_file)).split('.')[0]
+
+        with open_text(path_or_file, 'r', compression) as file:
+            reader = csv.reader(file, delimiter=sep)
+            columns = next(reader)
+            rows = ([value if value != '' else None for value in row]
+                    for row in reader)
+            sample = list(islice(rows, sample_size))
+            types = [self.TYPES[infer_type(row[i] for row in sample
+                                           if i < len(row))]
+                     for i in range(len(columns))]
+            with self._bulk_load():
+                return self.from_records(table, chain(sample, rows), columns,
+                                         types=types,
+                                         if_exists=if_exists,
+                                         batch_size=batch_size)
 
     @property
     def conn(self):
@@ -106,8 +430,109 @@ class _Schema(RdbmsMixin):
         """
         headers = ['name', 'type_code', 'display_size', 'internal_size',
                    'precision', 'scale', 'null_ok']
+        if self._session is not None and query in self._session:
+            return self._session[query]
+
         with self.cursor() as cursor:
-            return Table(*cursor.execute(query).description, columns=headers)
+            table = Table(*cursor.execute(query).description, columns=headers)
+
+        if self._session is not None:
+            self._session[query] = table
+
+        return table
+
+    def declared_types(self, table_name):
+        """Return declared types of table columns by their names."""
+        raise NotImplementedError
+
+    def _create_function(self, name, func, deterministic):
+        """Register scalar function in database under 'name'."""
+        raise NotImplementedError
+
+    def _create_aggregate(self, name, cls):
+        """Register aggregate class in database under 'name'."""
+        raise NotImplementedError
+
+    def _register(self, func, aggregate=False, deterministic=True):
+        """Return name of function in database, register it once."""
+        if func not in self._functions:
+            name = 'py_%s_%d' % (re.sub(r'\W', '', func.__name__),
+                                 len(self._functions))
+            if aggregate:
+                self._create_aggregate(name, func)
+            else:
+                self._create_function(name, func, deterministic)
+
+            self._functions[func] = name
+
+        return self._functions[func]
+
+    def scalar_function(self, func=None, deterministic=True):
+        """
+        Decorate function to call it in database over QSeries values.
+
+        Arguments of decorated function are QSeries over same rows or
+        constants, result is QSeries, so filters and aggregates
+        of it are executed in database too.
+
+        Args:
+            func (callable): function of values.
+            deterministic (bool): function returns same result for same
+                arguments, so database may optimize calls.
+
+        """
+        if func is None:
+            return lambda func: self.scalar_function(func, deterministic)
+
+        return _Function(self, func, False, deterministic)
+
+    def aggregate_function(self, cls):
+        """
+        Decorate class to aggregate QSeries values in database.
+
+        The class is instantiated for each group, its method 'step'
+        is called with values of each row and 'finalize' returns result.
+        """
+        return _Function(self, cls, True)
+
+    def estimate_rows(self, query):
+        """Return number of rows of query estimated by planner or None."""
+        return None
+
+    def value_sizes(self, table_name):
+        """
+        Return average memory of fetched values by column names.
+
+        Sizes are measured on first 'WIDTH_SAMPLE' rows of table.
+        """
+        query = 'SELECT * FROM %s LIMIT %d;' % (table_name, self.WIDTH_SAMPLE)
+        with self.cursor() as cursor:
+            cursor.execute(query)
+            names = [column[0] for column in cursor.description]
+            rows = cursor.fetchall()
+
+        return {
+            name: sum(sys.getsizeof(value) for value in values
+                      if value is not None) / len(rows) if rows else 0
+            for name, values in zip(names, zip(*rows) if rows
+                                    else [()] * len(names))
+        }
+
+    def data_version(self):
+        """
+        Return JSON serializable token which changes with data of database.
+
+        None is returned if version is unknown.
+        """
+        return None
+
+    def unique_columns(self, table_name):
+        """Return names of columns with unique values; none are by default."""
+        return set()
+
+    def row_estimate(self, table_name):
+        """Return number of table rows estimated by statistics or None."""
+        return None
 
     def columns(self, table_name):
         """Return columns info of the table. See 'cursor.description'."""
@@ -131,11 +556,109 @@ class _Schema(RdbmsMixin):
 
         raise TypeError("unknown key type: %r" % key.__class__.__name__)
 
+    def create_fulltext_index(self, table, columns, name=None):
+        """
+        Create full-text index of text columns of table.
+
+        Index is kept in sync with table by database.
+
+        Args:
+            table (str): name of indexed table.
+            columns (list of str): names of text columns.
+            name (str): name of index; default '<table>_fts'.
+
+        Return:
+            str: name of index.
+
+        """
+        raise NotImplementedError
+
+    def fulltext_index(self, table):
+        """Return name of full-text index of table."""
+        raise NotImplementedError
+
+    def union_shards(self, tables):
+        """
+        Return rows of tables with same columns as one QDataFrame.
+
+        Rows are concatenated by 'UNION ALL' in database, so joins and
+        aggregates over all shards run in one statement.
+
+        Args:
+            tables (list of str or QDataFrame): names of shard tables
+                or frames.
+
+        Return:
+            QDataFrame: concatenated rows.
+
+        """
+        parts = [self[table] if isinstance(table, str) else table
+                 for table in tables]
+        union = _inheritor(_UnionTable, self.ID)(parts)
+        return _inheritor(_QDataFrame, self.ID)(
+            source=(union, self.new_alias()),
+            schema=self
+        )
+
     def __str__(self):
         cols = [self.columns(tbl_name)['name'] for tbl_name in self.tables]
         return str(Table(*cols, columns=self.tables, transpose=True))
 
 
+def crosstab(index, columns, dropna=True):
+    """
+    Count rows by pairs of values of two series over same rows.
+
+    Args:
+        index (QSeries): values become rows.
+        columns (QSeries): values become columns.
+        dropna (bool): skip rows with NULL in any series; default True.
+
+    Return:
+        Table: counts of each value of 'columns' by values of 'index'.
+
+    """
+    if index.name == columns.name:
+        raise ValueError('series should have different names')
+
+    attrs = OrderedDict([(index.name, next(iter(index._attrs.values()))),
+                         (columns.name, index._operand(columns))])
+    frame = _inheritor(_QDataFrame, index.ID)(**dict(index.todict(),
+                                                     attrs=attrs))
+    return frame.pivot_table(index.name, columns.name, aggfunc='count',
+                             fill_value=0, dropna=dropna)
+
+
+class _Function:
+    """Python function which is called in database over QSeries values."""
+
+    __slots__ = ('_schema', '_func', '_aggregate', '_deterministic')
+
+    def __init__(self, schema, func, aggregate=False, deterministic=True):
+        """
+        Wrap function to register it on first call.
+
+        Args:
+            schema (_Schema): schema of database to register in.
+            func (callable or class): scalar function or aggregate class.
+            aggregate (bool): func is aggregate class if True.
+            deterministic (bool): scalar function is deterministic.
+
+        """
+        self._schema = schema
+        self._func = func
+        self._aggregate = aggregate
+        self._deterministic = deterministic
+
+    def __call__(self, series, *args):
+        """Return series of function of series and other arguments."""
+        name = self._schema._register(self._func, self._aggregate,
+                                      self._deterministic)
+        attr = next(iter(series._attrs.values()))
+        return series._with_expr(attr.udf(name), attr,
+                                 *(series._operand(arg) for arg in args))
+
+
 class Source:
     """Abstract class for sources ('FROM' statement)."""
 
@@ -145,6 +668,28 @@ class Source:
         """Return list of available attributes."""
         raise NotImplementedError
 
+    def tables(self, alias=None):
+        """Return names of original tables by their display names."""
+        return {}
+
+    def is_unique(self, attr):
+        """Return True if values of attribute are known to be unique."""
+        return False
+
+    def optimize(self, alias, leaves):
+        """
+        Return source pruned to used original attributes.
+
+        Args:
+            alias (str): alias of the source.
+            leaves (set of _Attribute): used original attributes.
+
+        Return:
+            tuple: optimized source and its alias.
+
+        """
+        return (self, alias)
+
     def __str__(self):
         """Return display name in 'FROM' statement."""
         raise NotImplementedError
@@ -164,11 +709,13 @@ class _OriginalTable(Source, RdbmsMixin):
 
     """
 
-    __slots__ = ('_name', '_schema')
+    __slots__ = ('_name', '_schema', '_columns', '_unique')
 
     def __init__(self, name, schema):
         self._name = name
         self._schema = schema
+        self._columns = None
+        self._unique = None
 
     def __str__(self):
         """Return display name in 'FROM' statemet."""
@@ -176,36 +723,58 @@ class _OriginalTable(Source, RdbmsMixin):
 
     def attributes(self, alias=None):
         """Return original attribute objects of table."""
+        if self._columns is None:
+            self._columns = tuple(self._schema.columns(self._name)['name'])
+
         cls = _inheritor(_Attribute, self.ID)
         return OrderedDict(
-            (name, cls(name, source=(alias or self._name)))
-            for name in self._schema.columns(self._name)['name']
+            (name, cls.original(name, source=(alias or self._name)))
+            for name in self._columns
         )
 
+    def tables(self, alias=None):
+        """Return name of table by its display name."""
+        return {alias or self._name: self._name}
+
+    def is_unique(self, attr):
+        """Return True if attribute is a unique key of table."""
+        if self._unique is None:
+            self._unique = self._schema.unique_columns(self._name)
+
+        return isinstance(attr._expr, str) and attr._expr in self._unique
+
 
 class _JoinedTable(Source, RdbmsMixin):
 
     __slots__ = ('_left', '_joins')
 
+    JOINS = {
+        'inner': 'INNER',
+        'left': 'LEFT',
+        'right': 'RIGHT',
+        'outer': 'FULL OUTER',
+    }
+
     def __init__(self, left, right, on, how=None):
         """
         Create joined source.
 
         Args:
-            left (Source): target source.
-            right (Source): object to merging.
-            on (tuple of attributes): both attributes to join on.
+            left (tuple): target source and its alias.
+            right (tuple): source to merging and its alias.
+            on (tuple of pairs of attributes): left and right attributes
+                to join on.
             how ({‘left’, ‘right’, ‘outer’, ‘inner’}): default ‘inner’.
 
         """
-        how = how or 'INNER'
-        if isinstance(left, self.__class__):
-            self._left = left._left
-            self._joins = left._joins + [(right, how.upper(), on)]
-
-        elif isinstance(left, self.__class__):
+        how = self.JOINS.get((how or 'inner').lower(), how)
+        if isinstance(right[0], _JoinedTable):
             raise NotImplementedError('right source should not be joined')
 
+        if isinstance(left[0], _JoinedTable) and left[1] is None:
+            self._left = left[0]._left
+            self._joins = left[0]._joins + [(right, how.upper(), on)]
+
         else:
             self._left = left
             self._joins = [(right, how.upper(), on)]
@@ -215,91 +784,514 @@ class _JoinedTable(Source, RdbmsMixin):
         return sum((source.attributes() for (source, _), _, _ in self._joins),
                    [])
 
+    def tables(self, alias=None):
+        """Return names of original tables by their display names."""
+        tables = self._left[0].tables(self._left[1])
+        for source, _, _ in self._joins:
+            tables.update(source[0].tables(source[1]))
+
+        return tables
+
+    def optimize(self, alias, leaves):
+        """
+        Return source without unused joins and with pruned sources.
+
+        A 'LEFT' join is eliminated if none of attributes of joined source
+        are used and it is joined on unique key, so it neither filters
+        nor multiplies rows.
+        """
+
+        def used(source, alias):
+            name = alias or str(source)
+            return {leaf for leaf in leaves if leaf._source == name}
+
+        leaves = set(leaves)
+        joins = []
+        for (source, salias), how, on in reversed(self._joins):
+            if how == 'LEFT' and not used(source, salias) \
+                    and any(source.is_unique(rattr) for _, rattr in on):
+                continue
+
+            rattrs = {rattr for _, rattr in on}
+            right = source.optimize(salias, used(source, salias) | rattrs)
+            joins.append((right, how, on))
+            for lattr, rattr in on:
+                leaves |= lattr.leaves() | rattr.leaves()
+
+        left = self._left[0].optimize(self._left[1], used(*self._left))
+        for right, how, on in reversed(joins):
+            left = (self.__class__(left, right, on, how), None)
+
+        return left
+
     def __str__(self):
 
         def make(source, alias):
             return str(source) + ((" AS %s" % alias) if alias else "")
 
         expr = make(self._left[0], self._left[1])
-        for source, how, (lattr, rattr) in self._joins:
-            expr += " %s JOIN %s ON %s=%s" % (how, make(*source), lattr, rattr)
+        for source, how, on in self._joins:
+            expr += " %s JOIN %s ON %s" % (
+                how, make(*source), ' AND '.join('%s=%s' % pair for pair in on)
+            )
         return expr
 
 
-class _Attribute(RdbmsMixin):
-    """
-    Attribute of database 'Source'.
-
-    Pure/original attributes keeps name of column and data type.
-    Complex attribute keeps expression tree with pure attributes.
-    Expression tree keeps in Lisp style like:
-        (function_object,
-            first_arg_,
-            ...,
-            (other_fun_object,
-                first_arg_for_other_fun,
-                ...,
-                last_arg_for_other_fun
-            )
-        )
-    Available functions are part of class as static methods.
-    Function returns display expression.
-    """
+class _FullTextMatch(Source, RdbmsMixin):
+    """Row identifiers of table matched by full-text query and rank."""
 
-    __slots__ = ('_expr', '_source')
+    __slots__ = ('_index', '_query', '_limit')
 
-    def __init__(self, expr, source=None):
+    def __init__(self, index, query, limit=None):
         """
-        Create expression for selection.
+        Match rows by full-text index.
 
         Args:
-            expr (str, tuple): display expression or expression tree.
-            source (str): name or alias of table.
+            index (str): name of full-text index.
+            query (str): full-text query.
+            limit (int): number of best matched rows; default all.
 
         """
-        self._expr = expr
-        self._source = source
+        self._index = index
+        self._query = query
+        self._limit = limit
 
-    def __hash__(self):
-        return hash(self._expr) ^ hash(self._source)
+    def attributes(self, alias=None):
+        """Return identifier of matched row ('docid') and its 'score'."""
+        cls = _inheritor(_Attribute, self.ID)
+        return OrderedDict((name, cls.original(name, source=alias))
+                           for name in ('docid', 'score'))
 
-    def compile(self):
-        """Compile expression tree."""
-        fun, args = self._expr[0], self._expr[1:]
-        return fun(*(("'%s'" % arg) if isinstance(arg, str) else str(arg)
-                     for arg in args))
+    def tables(self, alias=None):
+        """Return display name of matches without original table."""
+        return {alias: None} if alias else {}
 
-    def simplify(self):
-        """Simplify expression tree."""
-        raise NotImplementedError
 
-    def _reveal_alias(self):
-        """Extract matched alias from expression."""
-        if isinstance(self._expr, str):
-            return self._expr
+class _UnionTable(Source, RdbmsMixin):
+    """Rows of several QDataFrames with same columns ('UNION ALL')."""
 
-        raise NotImplementedError
+    __slots__ = ('_parts',)
 
-    def __str__(self):
-        """Return display expression for 'SELECT' statement."""
-        source = ("%s." % self._source) if self._source is not None else ""
-        expr = self._expr if isinstance(self._expr, str) else self.compile()
-        return source + expr
+    def __init__(self, parts):
+        """
+        Concatenate rows of parts.
 
-    @staticmethod
-    def sum(arg):
-        """Return display expression of 'SUM' aggregate function."""
-        return "SUM(%s)" % str(arg)
+        Args:
+            parts (list of QDataFrame): parts with same column labels.
 
-    @staticmethod
-    def mean(arg):
-        """Return display expression of 'AVG' aggregate function."""
-        return "AVG(%s)" % str(arg)
+        """
+        parts = tuple(parts)
+        if not parts:
+            raise ValueError('at least one part is required')
 
-    @staticmethod
-    def min(arg):
-        """Return display expression of 'MIN' aggregate function."""
-        return "MIN(%s)" % str(arg)
+        columns = parts[0].columns
+        for part in parts[1:]:
+            if part.columns != columns:
+                raise ValueError('columns of parts are different: %s, %s'
+                                 % (columns, part.columns))
+
+        self._parts = parts
+
+    def attributes(self, alias=None):
+        """Return original attributes of union with 'alias'."""
+        return self._parts[0].attributes(alias)
+
+    def tables(self, alias=None):
+        """Return display name of union without original table."""
+        return {alias: None} if alias else {}
+
+    def optimize(self, alias, leaves):
+        """Return union of parts which select only used columns."""
+        return (self.__class__(part.optimize(alias, leaves)[0]
+                               for part in self._parts),
+                alias)
+
+    def __str__(self):
+        """Return display subquery in 'FROM' statement."""
+        return '(%s)' % ' UNION ALL '.join(
+            part.statement() for part in self._parts
+        )
+
+
+_NOT_FOLDABLE = object()
+
+_FOLDABLE = {
+    'add': operator.add,
+    'sub': operator.sub,
+    'gt': operator.gt,
+    'lt': operator.lt,
+    'eq': operator.eq,
+    'ge': operator.ge,
+}
+
+
+def _is_int(value):
+    """Return True if value is an integer but not boolean constant."""
+    return isinstance(value, int) and not isinstance(value, bool)
+
+
+# Aggregate functions which reduce rows of query to one row.
+_AGGREGATES = ('sum', 'count', 'min', 'max', 'mean')
+
+# Operations which results are numbers (or NULL) whatever operands are.
+_ARITHMETIC = ('add', 'sub', 'mul', 'mod')
+
+
+def _is_numeric(arg):
+    """Return True if operand is known to be a number in SQL."""
+    if isinstance(arg, _Attribute):
+        if arg.is_const():
+            arg = arg._expr[1]
+        elif isinstance(arg._expr, str):
+            return False
+        else:
+            return arg._expr[0].__name__ in _ARITHMETIC
+
+    return isinstance(arg, (int, float)) and not isinstance(arg, bool)
+
+
+def _fold(name, *args):
+    """
+    Evaluate operation over constants like SQL does.
+
+    Only numbers are folded for arithmetic and numbers or strings of
+    the same type are folded for comparison, otherwise SQL semantic
+    differs from python one and '_NOT_FOLDABLE' is returned.
+    """
+    numbers = all(isinstance(arg, (int, float)) for arg in args)
+    strings = all(isinstance(arg, str) for arg in args)
+    if name in ('add', 'sub') and numbers:
+        return _FOLDABLE[name](*args)
+
+    if name in ('gt', 'ge', 'lt', 'eq') and (numbers or strings):
+        return int(_FOLDABLE[name](*args))
+
+    return _NOT_FOLDABLE
+
+
+def _encode_blob(value):
+    """Return blob value as base64 string, other values as is."""
+    if isinstance(value, (bytes, bytearray, memoryview)):
+        return base64.b64encode(value).decode('ascii')
+
+    return value
+
+
+def _encode_json(value):
+    """Return JSON serializable form of blob value."""
+    if isinstance(value, (bytes, bytearray, memoryview)):
+        return _encode_blob(value)
+
+    raise TypeError('value of type %s is not JSON serializable'
+                    % value.__class__.__name__)
+
+
+class _Attribute(RdbmsMixin):
+    """
+    Attribute of database 'Source'.
+
+    Pure/original attributes keeps name of column and data type.
+    Complex attribute keeps expression tree with pure attributes.
+    Expression tree keeps in Lisp style like:
+        (function_object,
+            first_arg_,
+            ...,
+            (other_fun_object,
+                first_arg_for_other_fun,
+                ...,
+                last_arg_for_other_fun
+            )
+        )
+    Available functions are part of class as static methods.
+    Function returns display expression.
+    """
+
+    __slots__ = ('_expr', '_source', '_key')
+
+    _ORIGINALS = {}
+
+    @classmethod
+    def original(cls, name, source):
+        """Return shared attribute object of original column."""
+        key = (cls, name, source)
+        try:
+            return cls._ORIGINALS[key]
+        except KeyError:
+            return cls._ORIGINALS.setdefault(key, cls(name, source=source))
+
+    def __init__(self, expr, source=None):
+        """
+        Create expression for selection.
+
+        Args:
+            expr (str, tuple): display expression or expression tree.
+            source (str): name or alias of table.
+
+        """
+        self._expr = expr
+        self._source = source
+        self._key = None
+
+    def __hash__(self):
+        return hash(self.key)
+
+    def __eq__(self, other):
+        if isinstance(other, _Attribute):
+            return self.key == other.key
+
+        return NotImplemented
+
+    @staticmethod
+    def literal(value):
+        """Return display expression of constant value."""
+        if value is None:
+            return "NULL"
+
+        if isinstance(value, bool):
+            return str(int(value))
+
+        if isinstance(value, str):
+            return "'%s'" % value.replace("'", "''")
+
+        return str(value)
+
+    @property
+    def key(self):
+        """
+        Return structural key of expression tree.
+
+        Equal keys mean equal display expressions, so the key is used
+        for comparison, hashing and caching of compiled subtrees.
+        """
+        if self._key is not None:
+            return self._key
+
+        if isinstance(self._expr, str):
+            self._key = ('attr', self._source, self._expr)
+
+        else:
+            fun, args = self._expr[0], self._expr[1:]
+            self._key = ('fun', fun.__name__) + tuple(
+                arg.key if isinstance(arg, _Attribute)
+                else ('const', type(arg).__name__, arg)
+                for arg in args
+            )
+
+        return self._key
+
+    def compile(self, cache=None):
+        """
+        Compile expression tree.
+
+        Args:
+            cache (dict): compiled expressions by structural key;
+                identical subtrees are compiled once per cache.
+
+        """
+        if cache is None:
+            cache = {}
+
+        key = self.key
+        if key not in cache:
+            if isinstance(self._expr, str):
+                source = ("%s." % self._source) if self._source else ""
+                cache[key] = source + self._expr
+
+            else:
+                fun, args = self._expr[0], self._expr[1:]
+                cache[key] = fun(*(arg.compile(cache)
+                                   if isinstance(arg, _Attribute)
+                                   else self.literal(arg)
+                                   for arg in args))
+
+        return cache[key]
+
+    def leaves(self):
+        """Return set of original attributes of expression tree."""
+        if isinstance(self._expr, str):
+            return {self}
+
+        return set().union(*(arg.leaves() for arg in self._expr[1:]
+                             if isinstance(arg, _Attribute)))
+
+    def functions(self):
+        """Return set of names of functions of expression tree."""
+        if isinstance(self._expr, str):
+            return set()
+
+        fun, *args = self._expr
+        return set.union({fun.__name__},
+                         *(arg.functions() for arg in args
+                           if isinstance(arg, _Attribute)))
+
+    def is_const(self):
+        """Return True if attribute is a constant value."""
+        return not isinstance(self._expr, str) \
+            and self._expr[0].__name__ == 'value'
+
+    def simplify(self, predicate=False, memo=None):
+        """
+        Simplify expression tree.
+
+        Folds operations over constants, eliminates identities
+        like 'x + 0' and 'x - 0' if 'x' is a number (text is cast
+        to number by them), and replaces 'x = x' by 'x IS NOT NULL'
+        if the expression is a predicate (e.g. 'WHERE' condition).
+        Structurally equal subtrees are shared as one object.
+
+        Args:
+            predicate (bool): expression is used as a condition.
+            memo (dict): simplified subtrees by structural key.
+
+        Return:
+            _Attribute: simplified expression.
+
+        """
+        if memo is None:
+            memo = {}
+
+        key = (predicate,) + self.key
+        if key in memo:
+            return memo[key]
+
+        if isinstance(self._expr, str):
+            memo[key] = self
+            return self
+
+        fun, args = self._expr[0], list(self._expr[1:])
+        args = [arg.simplify(memo=memo) if isinstance(arg, _Attribute)
+                else arg
+                for arg in args]
+        consts = [arg._expr[1] if isinstance(arg, _Attribute)
+                  and arg.is_const() else arg
+                  for arg in args]
+
+        name = fun.__name__
+        result = None
+        if name in _FOLDABLE and not any(isinstance(arg, _Attribute)
+                                         for arg in consts):
+            value = _fold(name, *consts)
+            if value is not _NOT_FOLDABLE:
+                result = self.__class__((self.value, value))
+
+        elif name in ('add', 'sub') and consts[1] == 0 \
+                and _is_int(consts[1]) and _is_numeric(args[0]):
+            result = args[0]
+
+        elif name == 'add' and consts[0] == 0 and _is_int(consts[0]) \
+                and _is_numeric(args[1]):
+            result = args[1]
+
+        elif name == 'eq' and predicate \
+                and all(isinstance(arg, _Attribute) for arg in args) \
+                and args[0].key == args[1].key:
+            result = self.__class__((self.notnull, args[0]))
+
+        if result is None:
+            result = self.__class__((fun, *args), source=self._source)
+
+        result = memo.setdefault((predicate,) + result.key, result)
+        memo[key] = result
+        return result
+
+    def _reveal_alias(self):
+        """Extract matched alias from expression."""
+        if isinstance(self._expr, str):
+            return self._expr
+
+        raise NotImplementedError
+
+    def __str__(self):
+        """Return display expression for 'SELECT' statement."""
+        return self.compile()
+
+    @staticmethod
+    def value(arg):
+        """Return display expression of constant."""
+        return str(arg)
+
+    @staticmethod
+    def notnull(arg):
+        """Return display expression of 'IS NOT NULL' operator."""
+        return "(%s IS NOT NULL)" % arg
+
+    @staticmethod
+    def isnull(arg):
+        """Return display expression of 'IS NULL' operator."""
+        return "(%s IS NULL)" % arg
+
+    @staticmethod
+    def coalesce(*args):
+        """Return display expression of first not NULL value."""
+        return "COALESCE(%s)" % ', '.join(args)
+
+    @staticmethod
+    def greatest(*args):
+        """Return display expression of maximum of values."""
+        return "GREATEST(%s)" % ', '.join(args)
+
+    @staticmethod
+    def least(*args):
+        """Return display expression of minimum of values."""
+        return "LEAST(%s)" % ', '.join(args)
+
+    @staticmethod
+    @lru_cache(maxsize=None)
+    def cast(type_name):
+        """Return display expression function of conversion to type."""
+
+        def cast(arg):
+            return "CAST(%s AS %s)" % (arg, type_name)
+
+        cast.__name__ = 'cast_%s' % type_name.lower()
+        return cast
+
+    STORAGE_CLASSES = ()
+
+    @staticmethod
+    def quote(name):
+        """Return display expression of quoted identifier."""
+        return '"%s"' % name.replace('"', '""')
+
+    @staticmethod
+    def count(arg):
+        """Return display expression of 'COUNT' aggregate function."""
+        return "COUNT(%s)" % str(arg)
+
+    @staticmethod
+    def nbytes(arg):
+        """Return display expression of total size of values in bytes."""
+        return "SUM(LENGTH(%s))" % str(arg)
+
+    @staticmethod
+    def typeof(arg):
+        """Return display expression of storage class of value."""
+        raise NotImplementedError
+
+    @staticmethod
+    def epoch(arg, unit):
+        """Return display expression of integer seconds since epoch."""
+        raise NotImplementedError
+
+    @staticmethod
+    def from_epoch(arg):
+        """Return display expression of timestamp text of epoch seconds."""
+        raise NotImplementedError
+
+    @staticmethod
+    def sum(arg):
+        """Return display expression of 'SUM' aggregate function."""
+        return "SUM(%s)" % str(arg)
+
+    @staticmethod
+    def mean(arg):
+        """Return display expression of 'AVG' aggregate function."""
+        return "AVG(%s)" % str(arg)
+
+    @staticmethod
+    def min(arg):
+        """Return display expression of 'MIN' aggregate function."""
+        return "MIN(%s)" % str(arg)
 
     @staticmethod
     def max(arg):
@@ -331,6 +1323,200 @@ class _Attribute(RdbmsMixin):
         """Return display expression of '=' operator."""
         return "(%s = %s)" % args
 
+    @staticmethod
+    def ge(*args):
+        """Return display expression of '>=' operator."""
+        return "(%s >= %s)" % args
+
+    @staticmethod
+    def like(arg, pattern):
+        r"""Return display expression of 'LIKE' with '\' as escape."""
+        return "(%s LIKE %s ESCAPE '\\')" % (arg, pattern)
+
+    @staticmethod
+    def glob(arg, pattern):
+        """Return display expression of case-sensitive pattern matching."""
+        raise NotImplementedError
+
+    @staticmethod
+    def fulltext(index):
+        """Return display expression function of full-text match."""
+        raise NotImplementedError
+
+    @staticmethod
+    def instr(arg, substring):
+        """Return display expression of position of substring from 1."""
+        return "INSTR(%s, %s)" % (arg, substring)
+
+    @staticmethod
+    def lower(arg):
+        """Return display expression of lower case text."""
+        return "LOWER(%s)" % arg
+
+    @staticmethod
+    def upper(arg):
+        """Return display expression of upper case text."""
+        return "UPPER(%s)" % arg
+
+    @staticmethod
+    def length(arg):
+        """Return display expression of number of characters."""
+        return "LENGTH(%s)" % arg
+
+    @staticmethod
+    def substr(*args):
+        """Return display expression of substring from 1-based position."""
+        return "SUBSTR(%s)" % ', '.join(args)
+
+    @staticmethod
+    def mul(*args):
+        """Return display expression of '*' operator."""
+        return "(%s * %s)" % args
+
+    @staticmethod
+    def mod(*args):
+        """Return display expression of '%' operator."""
+        return "(%s %% %s)" % args
+
+    @staticmethod
+    def bitand(*args):
+        """Return display expression of '&' operator."""
+        return "(%s & %s)" % args
+
+    @staticmethod
+    def bitor(*args):
+        """Return display expression of '|' operator."""
+        return "(%s | %s)" % args
+
+    @staticmethod
+    def rshift(*args):
+        """Return display expression of '>>' operator."""
+        return "(%s >> %s)" % args
+
+    @staticmethod
+    def conj(*args):
+        """Return display expression of 'AND' operator."""
+        return "(%s AND %s)" % args
+
+    @staticmethod
+    def isin(arg, *values):
+        """Return display expression of 'IN' operator."""
+        return "(%s IN (%s))" % (arg, ', '.join(values))
+
+    @staticmethod
+    def div(*args):
+        """Return display expression of '/' operator."""
+        return "(%s / %s)" % args
+
+    @staticmethod
+    def when(condition, value):
+        """Return display expression of value if condition else NULL."""
+        return "CASE WHEN %s THEN %s END" % (condition, value)
+
+    @staticmethod
+    def choose(condition, value, other):
+        """Return display expression of value if condition else other."""
+        return "CASE WHEN %s THEN %s ELSE %s END" % (condition, value, other)
+
+    @staticmethod
+    def keys(*args):
+        """Return display expression of list of expressions."""
+        return ', '.join(args)
+
+    @staticmethod
+    def desc(arg):
+        """Return display expression of descending order."""
+        return "%s DESC" % arg
+
+    @staticmethod
+    def partition(*args):
+        """Return display expression of window partitioning."""
+        return "PARTITION BY %s" % ', '.join(args)
+
+    @staticmethod
+    def window(order, *partition):
+        """Return display expression of window partitioning and ordering."""
+        if not partition:
+            return "ORDER BY %s" % order
+
+        return "PARTITION BY %s ORDER BY %s" % (', '.join(partition), order)
+
+    @staticmethod
+    def rank(window):
+        """Return display expression of 'RANK' window function."""
+        return "RANK() OVER (%s)" % window
+
+    @staticmethod
+    def dense_rank(window):
+        """Return display expression of 'DENSE_RANK' window function."""
+        return "DENSE_RANK() OVER (%s)" % window
+
+    @staticmethod
+    def row_number(window):
+        """Return display expression of 'ROW_NUMBER' window function."""
+        return "ROW_NUMBER() OVER (%s)" % window
+
+    @staticmethod
+    def peers(window):
+        """Return display expression of number of rows in window."""
+        return "COUNT(*) OVER (%s)" % window
+
+    @staticmethod
+    @lru_cache(maxsize=None)
+    def udf(name):
+        """Return display expression function of registered function."""
+
+        def call(*args):
+            return "%s(%s)" % (name, ', '.join(args))
+
+        call.__name__ = name
+        return call
+
+    @staticmethod
+    def cumsum(arg, window):
+        """Return display expression of cumulative sum."""
+        return "SUM(%s) OVER (%s ROWS UNBOUNDED PRECEDING)" % (arg, window)
+
+    @staticmethod
+    def lag(arg, offset, window):
+        """Return display expression of 'LAG' window function."""
+        return "LAG(%s, %s) OVER (%s)" % (arg, offset, window)
+
+    @staticmethod
+    def lead(arg, offset, window):
+        """Return display expression of 'LEAD' window function."""
+        return "LEAD(%s, %s) OVER (%s)" % (arg, offset, window)
+
+    @staticmethod
+    def rolling_sum(arg, window, preceding):
+        """Return display expression of moving sum."""
+        return ("SUM(%s) OVER (%s ROWS BETWEEN %s PRECEDING AND CURRENT ROW)"
+                % (arg, window, preceding))
+
+    @staticmethod
+    def rolling_mean(arg, window, preceding):
+        """Return display expression of moving average."""
+        return ("AVG(%s) OVER (%s ROWS BETWEEN %s PRECEDING AND CURRENT ROW)"
+                % (arg, window, preceding))
+
+    @staticmethod
+    def rolling_min(arg, window, preceding):
+        """Return display expression of moving minimum."""
+        return ("MIN(%s) OVER (%s ROWS BETWEEN %s PRECEDING AND CURRENT ROW)"
+                % (arg, window, preceding))
+
+    @staticmethod
+    def rolling_max(arg, window, preceding):
+        """Return display expression of moving maximum."""
+        return ("MAX(%s) OVER (%s ROWS BETWEEN %s PRECEDING AND CURRENT ROW)"
+                % (arg, window, preceding))
+
+    @staticmethod
+    def rolling_count(arg, window, preceding):
+        """Return display expression of moving count of non-NULL values."""
+        return ("COUNT(%s) OVER (%s ROWS BETWEEN %s PRECEDING AND CURRENT ROW)"
+                % (arg, window, preceding))
+
 
 class Query:
     """
@@ -338,7 +1524,7 @@ class Query:
 
     Supported syntax:
         SELECT [distinct] [attributes] FROM [source]
-        WHERE [conditional] LIMIT [] OFFSET []
+        WHERE [conditional] ORDER BY [attributes] LIMIT [] OFFSET []
 
     """
 
@@ -348,47 +1534,203 @@ class Query:
         '_attrs',
         '_source',
         '_where',
+        '_order',
         '_start',
         '_stop',
     )
 
-    def __init__(self, schema,
-                 distinct=None,
-                 attrs=None,
-                 source=None,
-                 where=None,
-                 start=None,
-                 stop=None):
+    def __init__(self, schema,
+                 distinct=None,
+                 attrs=None,
+                 source=None,
+                 where=None,
+                 order=None,
+                 start=None,
+                 stop=None):
+        """
+        Structured Query Language wrapper.
+
+        Args:
+            schema (_Schema): schema object of RBDMS.
+            distinct (bool): set SELECT DISTINCT if True.
+            attrs (list of _Attribute or str): list of selected attributes
+            source (Source): source of attributes
+            where (_Attribute): choose row where attribute is True.
+            order (tuple of _Attribute): sort rows by ascending attributes.
+            start (int): number of first row
+            stop (int): number of last row
+
+        Note:
+            use 'copy_with' method to create same query.
+
+        """
+        self._schema = schema
+        self._distinct = distinct
+        self._attrs = attrs
+        self._source = source
+        self._where = where
+        self._order = order
+        self._start = start
+        self._stop = stop
+
+    SAMPLE_SIZE = 10000
+
+    def _rowid(self):
+        """Return rowid attribute of single table source."""
+        source, alias = self._source
+        if self.ROWID is None or not isinstance(source, _OriginalTable):
+            raise ValueError('single table with rowid is required')
+
+        cls = _inheritor(_Attribute, self.ID)
+        return cls.original(self.ROWID, source=(alias or str(source)))
+
+    # Average memory of computed value in bytes.
+    VALUE_SIZE = 32
+
+    def estimate(self):
+        """
+        Return estimated size of result without its execution.
+
+        Number of rows is estimated by query planner and statistics
+        of tables (see 'ANALYZE'), one row is expected for aggregates.
+        Memory of fetched rows is based on average sizes of values
+        of sampled table rows.
+
+        Return:
+            ResultSize: estimated number of rows and bytes.
+
+        """
+        rows = self._schema.estimate_rows(self.statement())
+        if rows is None:
+            return ResultSize(None, None)
+
+        source, alias = self._source
+        attrs = self._attrs
+        if attrs is None:
+            attrs = source.attributes(alias)
+
+        if attrs and all(not isinstance(attr._expr, str)
+                         and attr._expr[0].__name__ in _AGGREGATES
+                         for attr in attrs.values()):
+            rows = 1
+
+        if self._stop is not None:
+            rows = min(rows, self._stop - (self._start or 0))
+
+        tables = source.tables(alias)
+        sizes = {}
+        row_size = sys.getsizeof(tuple(attrs))
+        for attr in attrs.values():
+            table = tables.get(attr._source)
+            if table is None or not isinstance(attr._expr, str):
+                row_size += self.VALUE_SIZE
+                continue
+
+            if table not in sizes:
+                sizes[table] = self._schema.value_sizes(table)
+
+            row_size += sizes[table].get(attr._expr, self.VALUE_SIZE)
+
+        return ResultSize(rows, int(rows * row_size))
+
+    def incremental(self, key=None):
+        """
+        Return result of the query refreshed by new rows of source only.
+
+        Args:
+            key (str): label of increasing column of source table,
+                e.g. autoincrement id or timestamp of append-only table;
+                default row identifier of single table.
+
+        Return:
+            _Incremental: result to 'refresh'.
+
+        """
+        return _Incremental(self, key)
+
+    def _restrict(self, condition):
+        """
+        Return query with extra condition of 'WHERE' statement.
+
+        Condition over window functions is not allowed in 'WHERE',
+        so it is selected by subquery and filtered by outer query.
+        """
+        if 'window' in condition.functions():
+            return self._restrict_window(condition)
+
+        if self._where is not None:
+            condition = condition.__class__(
+                (condition.conj, self._where, condition)
+            )
+
+        return self.copy_with(where=condition)
+
+    def _restrict_window(self, condition):
+        """Return query filtered by window condition of subquery."""
+        source, alias = self._source
+        attrs = OrderedDict(source.attributes(alias) if self._attrs is None
+                            else self._attrs)
+        label = '_' + self._schema.new_alias(attrs)
+        attrs[label] = condition
+        subquery = _inheritor(_QDataFrame, self.ID)(
+            **dict(self.todict(), attrs=attrs)
+        )
+        alias = self._schema.new_alias(source.tables(alias))
+        attrs = subquery.attributes(alias)
+        where = attrs.pop(label)
+        return self.__class__(self._schema, attrs=attrs,
+                              source=(subquery, alias), where=where)
+
+    def _draw(self, n, seed=None):
         """
-        Structured Query Language wrapper.
+        Restrict query to randomly drawn rowids of source table.
 
-        Args:
-            schema (_Schema): schema object of RBDMS.
-            distinct (bool): set SELECT DISTINCT if True.
-            attrs (list of _Attribute or str): list of selected attributes
-            source (Source): source of attributes
-            where (_Attribute): choose row where attribute is True.
-            start (int): number of first row
-            stop (int): number of last row
+        Only minimum and maximum of rowid are looked up, drawn rowids
+        are fetched by primary key, so the table is not scanned.
 
-        Note:
-            use 'copy_with' method to create same query.
+        Return:
+            tuple: restricted query, number of drawn rowids and
+                size of rowids range.
 
         """
-        self._schema = schema
-        self._distinct = distinct
-        self._attrs = attrs
-        self._source = source
-        self._where = where
-        self._start = start
-        self._stop = stop
+        rowid = self._rowid()
+        query = 'SELECT MIN(%s), MAX(%s)' % (rowid, rowid)
+        query += self._query_from() + ';'
+        low, high = self._schema.fetchall(query)[0]
+        population = range(low, high + 1) if low is not None else range(0)
+        rowids = sorted(random.Random(seed).sample(population,
+                                                   min(n, len(population))))
+        cls = rowid.__class__
+        return (self._restrict(cls((cls.isin, rowid, *rowids))),
+                len(rowids), len(population))
+
+    @staticmethod
+    def _confidence(drawn, population):
+        """Return 95% confidence factor with finite population correction."""
+        if drawn >= population:
+            return 0
+
+        return 1.96 * math.sqrt((population - drawn)
+                                / max(population - 1, 1) / drawn)
+
+    def _estimate_rows(self, sample_size=None, seed=None):
+        """Estimate number of rows by sample of rowids."""
+        sample, drawn, population = self._draw(
+            sample_size or self.SAMPLE_SIZE, seed
+        )
+        if drawn == 0:
+            return Estimate(0, 0)
+
+        query = 'SELECT COUNT(*) FROM (%s);' % sample.statement()
+        ratio = self._schema.fetchall(query)[0][0] / drawn
+        error = self._confidence(drawn, population) \
+            * math.sqrt(ratio * (1 - ratio))
+        return Estimate(population * ratio, population * error)
 
     def todict(self):
         """Dump query to python dictionary."""
-        slots = sum((list(getattr(cls, '__slots__', []))
-                     for cls in self.__class__.__mro__),
-                    [])
-        return {slot.strip('_'): getattr(self, slot) for slot in slots}
+        return {key: getattr(self, slot)
+                for slot, key in _slots(self.__class__)}
 
     def difference(self, other):
         """Return difference of two SQL queries."""
@@ -406,7 +1748,7 @@ class Query:
         params.update(kwargs)
         return self.__class__(**params)
 
-    def _query_select(self):
+    def _query_select(self, cache=None):
         """Return display expression of attributes."""
         if self._attrs is None:
             expr = '*'
@@ -414,12 +1756,11 @@ class Query:
         elif isinstance(self._attrs, dict):
 
             def make(attr, alias):
-                expr = str(attr)
-                if not alias or expr.split('.')[1] == alias:
-                    alias = ""
-                else:
-                    alias = ' AS %s' % alias
-                return str(attr) + alias
+                expr = attr.simplify().compile(cache)
+                if not alias or expr.split('.')[-1] == alias:
+                    return expr
+
+                return expr + ' AS %s' % alias
 
             expr = ', '.join(make(attr, alias)
                              for alias, attr in self._attrs.items())
@@ -432,9 +1773,28 @@ class Query:
 
         return 'SELECT %s' % expr
 
-    def _query_from(self):
-        alias = (" AS %s" % self._source[1]) if self._source[1] else ""
-        return ' FROM %s' % (str(self._source[0]) + alias)
+    def _query_from(self, source=None):
+        """Return display 'FROM' part of query."""
+        source, alias = source or self._source
+        alias = (" AS %s" % alias) if alias else ""
+        return ' FROM %s' % (str(source) + alias)
+
+    def _optimize(self):
+        """Return source without unused joins and columns."""
+        if not isinstance(self._attrs, dict):
+            return self._source
+
+        leaves = set()
+        for attr in self._attrs.values():
+            leaves |= attr.leaves()
+
+        if self._where is not None:
+            leaves |= self._where.leaves()
+
+        for attr in self._order or ():
+            leaves |= attr.leaves()
+
+        return self._source[0].optimize(self._source[1], leaves)
 
     def _query_base(self):
         """Return display part of query with SELECT and FROM."""
@@ -453,9 +1813,21 @@ class Query:
             "source": source
         }
 
-    def _query_where(self):
+    def _query_where(self, cache=None):
         """Return display 'WHERE' part of query."""
-        return " WHERE %s" % str(self._where) if self._where else ""
+        if self._where is None:
+            return ""
+
+        where = self._where.simplify(predicate=True)
+        return " WHERE %s" % where.compile(cache)
+
+    def _query_order(self, cache=None):
+        """Return display 'ORDER BY' part of query."""
+        if not self._order:
+            return ""
+
+        return " ORDER BY %s" % ', '.join(attr.simplify().compile(cache)
+                                          for attr in self._order)
 
     def _query_limits(self):
         """Return display 'LIMIT/OFFSET' part of query."""
@@ -473,14 +1845,20 @@ class Query:
 
         raise ValueError('bad slice: [%r, %r]' % (self._start, self._stop))
 
-    def query(self):
-        """Return display SQL query."""
+    def statement(self):
+        """Return display SQL query without terminating semicolon."""
+        cache = {}
         query = ''
-        query += self._query_select()
-        query += self._query_from()
-        query += self._query_where()
+        query += self._query_select(cache)
+        query += self._query_from(self._optimize())
+        query += self._query_where(cache)
+        query += self._query_order(cache)
         query += self._query_limits()
-        return query + ';'
+        return query
+
+    def query(self):
+        """Return display SQL query."""
+        return self.statement() + ';'
 
 
 class _iLocIndexer:
@@ -506,6 +1884,471 @@ class _iLocIndexer:
         raise TypeError('unsupported key type: %s' % key.__class__.__name__)
 
 
+class _Rolling:
+    """Provide rolling window calculations over Series."""
+
+    __slots__ = ('_series', '_window', '_min_periods', '_spec')
+
+    def __init__(self, series, window, min_periods, spec):
+        """
+        Create rolling window over series.
+
+        Args:
+            series (QSeries): target series.
+            window (int): number of rows in moving window.
+            min_periods (int): minimum number of non-NULL values in window
+                required to have a value, otherwise result is NULL.
+            spec (_Attribute): window partitioning and ordering.
+
+        """
+        self._series = series
+        self._window = window
+        self._min_periods = window if min_periods is None else min_periods
+        self._spec = spec
+
+    def _aggregate(self, name):
+        """Return series of moving aggregate function."""
+        alias, attr = next(iter(self._series._attrs.items()))
+        cls = attr.__class__
+        preceding = self._window - 1
+        expr = cls((getattr(cls, 'rolling_' + name), attr, self._spec,
+                    preceding))
+        if self._min_periods > 0:
+            count = cls((cls.rolling_count, attr, self._spec, preceding))
+            enough = cls((cls.gt, count, self._min_periods - 1))
+            expr = cls((cls.when, enough, expr))
+
+        return self._series.copy_with(attrs={alias: expr})
+
+    def sum(self):
+        """Return moving sum."""
+        return self._aggregate('sum')
+
+    def mean(self):
+        """Return moving average."""
+        return self._aggregate('mean')
+
+    def min(self):
+        """Return moving minimum."""
+        return self._aggregate('min')
+
+    def max(self):
+        """Return moving maximum."""
+        return self._aggregate('max')
+
+
+class _StringMethods:
+    """Vectorized string functions of Series computed in database."""
+
+    __slots__ = ('_series',)
+
+    def __init__(self, series):
+        """
+        Create accessor of string functions.
+
+        Args:
+            series (QSeries): series of text values.
+
+        """
+        self._series = series
+
+    def _apply(self, name, *args):
+        """Return series of function of values and constant arguments."""
+        attr = next(iter(self._series._attrs.values()))
+        return self._series._with_expr(getattr(attr, name), attr, *args)
+
+    @staticmethod
+    def _escape_like(text):
+        r"""Escape wildcards of 'LIKE' pattern by '\'."""
+        return text.replace('\\', '\\\\').replace('%', '\\%') \
+                   .replace('_', '\\_')
+
+    @staticmethod
+    def _escape_glob(text):
+        """Escape wildcards of 'GLOB' pattern by brackets."""
+        return ''.join('[%s]' % char if char in '*?[' else char
+                       for char in text)
+
+    def startswith(self, prefix):
+        """
+        Return whether values start with prefix (case-sensitive).
+
+        The test is a range of values from prefix up to next prefix,
+        so it is satisfied by index of column.
+        """
+        attr = next(iter(self._series._attrs.values()))
+        cls = attr.__class__
+        if not prefix:
+            return self._apply('notnull')
+
+        condition = cls((cls.ge, attr, prefix))
+        if ord(prefix[-1]) < 0x10ffff:
+            upper = prefix[:-1] + chr(ord(prefix[-1]) + 1)
+            condition = cls((cls.conj, condition, cls((cls.lt, attr, upper))))
+
+        return self._series.copy_with(attrs={self._series.name: condition})
+
+    def endswith(self, suffix):
+        """Return whether values end with suffix (case-sensitive)."""
+        return self._apply('glob', '*' + self._escape_glob(suffix))
+
+    def contains(self, pat, case=True):
+        """
+        Return whether values contain substring.
+
+        Args:
+            pat (str): substring, it is not a regular expression.
+            case (bool): case-sensitive if True, otherwise ASCII letters
+                are matched regardless of case.
+
+        """
+        if case:
+            attr = next(iter(self._series._attrs.values()))
+            cls = attr.__class__
+            return self._series._with_expr(
+                cls.gt, cls((cls.instr, attr, pat)), 0
+            )
+
+        return self._apply('like', '%%%s%%' % self._escape_like(pat))
+
+    def match(self, query):
+        """
+        Return whether values are matched by full-text query.
+
+        Matches are looked up in full-text index of the table
+        (see 'Schema.create_fulltext_index') restricted to the column.
+        """
+        series = self._series
+        attr = next(iter(series._attrs.values()))
+        if not isinstance(attr._expr, str):
+            raise ValueError('full-text search requires table column')
+
+        cls = attr.__class__
+        rowid = series._rowid()
+        index = series._schema.fulltext_index(series._source[0]._name)
+        return series._with_expr(
+            cls.fulltext(index), rowid,
+            '%s : (%s)' % (cls.quote(attr._expr), query)
+        )
+
+    def lower(self):
+        """Return values converted to lower case."""
+        return self._apply('lower')
+
+    def upper(self):
+        """Return values converted to upper case."""
+        return self._apply('upper')
+
+    def len(self):
+        """Return number of characters of values."""
+        return self._apply('length')
+
+    def slice(self, start=None, stop=None):
+        """
+        Return substrings by Python slice of characters without step.
+
+        Args:
+            start (int): first position; default 0.
+            stop (int): end position, it is not included; default end.
+
+        """
+        start = start or 0
+        if stop is None:
+            return self._apply('substr', start + 1 if start >= 0 else start)
+
+        if (start < 0) != (stop < 0):
+            raise ValueError('start and stop should have same sign')
+
+        if start >= 0:
+            return self._apply('substr', start + 1, max(stop - start, 0))
+
+        return self._apply('substr', start, max(stop - start, 0))
+
+
+class _Resampler:
+    """Group rows of DataFrame by time buckets."""
+
+    __slots__ = ('_qdf', '_column', '_step', '_origin', '_unit')
+
+    FREQUENCIES = {'s': 1, 'min': 60, 'h': 3600, 'd': 86400, 'w': 604800}
+
+    # Weeks start on Monday, 1970-01-05.
+    WEEK_ORIGIN = 345600
+
+    AGGREGATES = ('sum', 'mean', 'min', 'max', 'count', 'size')
+
+    def __init__(self, qdf, column, freq, unit):
+        """
+        Create resampler over DataFrame.
+
+        Args:
+            qdf (QDataFrame): target query data frame.
+            column (str): label of timestamp column, ISO text or epoch.
+            freq (str): length of bucket, e.g. '15min', '1h', '1d', '1w'.
+            unit ({'s', 'ms'}): unit of epoch numbers.
+
+        """
+        match = re.fullmatch(r'(\d*)(s|min|h|d|w)', freq.lower())
+        if match is None:
+            raise ValueError('unknown frequency: %r' % freq)
+
+        if unit not in ('s', 'ms'):
+            raise ValueError('unknown unit: %r' % unit)
+
+        if column not in qdf.columns:
+            raise ValueError('unknown column: %r' % column)
+
+        number, name = match.groups()
+        self._qdf = qdf
+        self._column = column
+        self._step = int(number or 1) * self.FREQUENCIES[name]
+        self._origin = self.WEEK_ORIGIN if name == 'w' else 0
+        self._unit = unit
+
+    def agg(self, func, fill=False):
+        """
+        Aggregate columns within each time bucket with one grouping query.
+
+        Args:
+            func (dict): aggregation of column by its label, one of
+                'AGGREGATES'; pair of column label and aggregation
+                may be given as value to name result column by key.
+            fill (bool): add empty buckets between first and last ones,
+                they are generated by recursive query; sums and counts
+                of empty buckets are 0, other aggregates are None.
+
+        Return:
+            Table: start of bucket and aggregated columns ordered by time.
+                Bucket is ISO text for text timestamps, epoch otherwise.
+
+        """
+        cls = _inheritor(_Attribute, self._qdf.ID)
+        specs = []
+        for label, spec in func.items():
+            column, name = spec if isinstance(spec, tuple) else (label, spec)
+            if name not in self.AGGREGATES:
+                raise ValueError('unknown aggregation: %r' % name)
+
+            if column not in self._qdf.columns:
+                raise ValueError('unknown column: %r' % column)
+
+            expr = 'COUNT(*)' if name == 'size' \
+                else getattr(cls, name)(cls.quote(column))
+            specs.append((label, name, expr))
+
+        column = cls.quote(self._column)
+        epoch = cls.epoch(column, self._unit)
+        bucket = '(%(e)s - %(o)d) / %(s)d * %(s)d + %(o)d' % {
+            'e': epoch, 'o': self._origin, 's': self._step
+        }
+        groups = (
+            'SELECT %(b)s AS k, MAX(%(t)s = %(text)s) AS t%(a)s'
+            ' FROM (%(q)s) WHERE %(e)s IS NOT NULL GROUP BY k' % {
+                'b': bucket, 't': cls.typeof(column),
+                'text': cls.literal('text'),
+                'a': ''.join(', %s AS a%d' % (expr, i)
+                             for i, (_, _, expr) in enumerate(specs)),
+                'q': self._qdf.statement(), 'e': epoch,
+            }
+        )
+        label = 'CASE WHEN (SELECT MAX(t) FROM g) THEN %s ELSE r.k END' \
+            % cls.from_epoch('r.k')
+        values = ''.join(
+            ', COALESCE(g.a%d, 0)' % i
+            if fill and name in ('sum', 'count', 'size')
+            else ', g.a%d' % i
+            for i, (_, name, _) in enumerate(specs)
+        )
+        if fill:
+            buckets = (
+                'r(k) AS (SELECT MIN(k) FROM g UNION ALL SELECT k + %d'
+                ' FROM r WHERE k < (SELECT MAX(k) FROM g))' % self._step
+            )
+        else:
+            buckets = 'r(k) AS (SELECT k FROM g)'
+
+        query = (
+            'WITH RECURSIVE g AS (%(g)s), %(r)s'
+            ' SELECT %(l)s%(v)s FROM r LEFT JOIN g ON r.k = g.k'
+            ' WHERE r.k IS NOT NULL ORDER BY r.k;' % {
+                'g': groups, 'r': buckets, 'l': label, 'v': values
+            }
+        )
+        return Table(*self._qdf._schema.fetchall(query),
+                     columns=[self._column] + [label for label, _, _ in specs])
+
+    def sum(self):
+        """Return sums of other columns by bucket."""
+        return self.agg({label: 'sum' for label in self._qdf.columns
+                         if label != self._column})
+
+    def mean(self):
+        """Return averages of other columns by bucket."""
+        return self.agg({label: 'mean' for label in self._qdf.columns
+                         if label != self._column})
+
+    def size(self):
+        """Return numbers of rows by bucket."""
+        return self.agg({'size': (self._column, 'size')})
+
+
+class _Incremental:
+    """
+    Result of query which is refreshed by new rows of source only.
+
+    Rows of source are assumed to be appended with increasing key
+    (e.g. 'rowid' of append-only table), so a refresh fetches rows
+    with key above the high-water mark of previous one. Row-wise queries
+    accumulate new rows, aggregate queries ('SUM', 'COUNT', 'MIN', 'MAX'
+    and 'AVG' as sum and count) merge partial aggregates of new rows.
+    """
+
+    __slots__ = ('_query', '_key', '_mark', '_partials', '_result')
+
+    AGGREGATES = _AGGREGATES
+
+    def __init__(self, query, key=None):
+        """
+        Make incremental result of query.
+
+        Args:
+            query (Query): row-wise or aggregate query without
+                'DISTINCT' and limits.
+            key (str): label of increasing column of source table;
+                default row identifier of single table.
+
+        """
+        if query._distinct or query._start is not None \
+                or query._stop is not None:
+            raise ValueError('query with distinct or limits '
+                             'is not incremental')
+
+        source_attrs = query._source[0].attributes(query._source[1])
+        attrs = source_attrs if query._attrs is None else query._attrs
+        if key is None:
+            key = query._rowid()
+        elif key in source_attrs:
+            key = source_attrs[key]
+        else:
+            raise ValueError('unknown key: %r' % key)
+
+        tops = [None if isinstance(attr._expr, str) else attr._expr[0].__name__
+                for attr in attrs.values()]
+        if all(top in self.AGGREGATES for top in tops):
+            self._partials = tops
+        elif not any(attr.functions() & {'window', *self.AGGREGATES}
+                     for attr in attrs.values()):
+            self._partials = None
+        else:
+            raise ValueError('only row-wise queries and aggregates %s '
+                             'are incremental' % (self.AGGREGATES,))
+
+        self._query = query.copy_with(attrs=attrs)
+        self._key = key
+        self._mark = None
+        self._result = None
+
+    def _delta(self):
+        """Return query of new rows or partial aggregates of them."""
+        cls = self._key.__class__
+        attrs = OrderedDict()
+        for i, attr in enumerate(self._query._attrs.values()):
+            if self._partials is not None and self._partials[i] == 'mean':
+                attrs['_%d_sum' % i] = cls((cls.sum, attr._expr[1]))
+                attrs['_%d_count' % i] = cls((cls.count, attr._expr[1]))
+            else:
+                attrs['_%d' % i] = attr
+
+        if self._partials is None:
+            attrs['_mark'] = self._key
+        else:
+            attrs['_rows'] = cls((cls.count, self._key))
+            attrs['_mark'] = cls((cls.max, self._key))
+
+        query = self._query.copy_with(attrs=attrs)
+        if self._mark is not None:
+            query = query._restrict(cls((cls.gt, self._key, self._mark)))
+
+        return query
+
+    @staticmethod
+    def _merge(name, previous, value):
+        """Merge previous and new partial aggregates skipping NULLs."""
+        if previous is None or value is None:
+            return value if previous is None else previous
+
+        if name == 'min':
+            return min(previous, value)
+
+        if name == 'max':
+            return max(previous, value)
+
+        return previous + value
+
+    def refresh(self):
+        """
+        Fetch new rows of source and update the result.
+
+        Return:
+            int: number of new rows of source.
+
+        """
+        rows = self._query._schema.fetchall(self._delta().query())
+        if self._partials is None:
+            self._result = (self._result or []) + [row[:-1] for row in rows]
+            if rows:
+                self._mark = max(row[-1] for row in rows)
+
+            return len(rows)
+
+        *values, count, mark = rows[0]
+        values = iter(values)
+        result = []
+        previous_result = self._result or [None] * len(self._partials)
+        for name, previous in zip(self._partials, previous_result):
+            if name == 'mean':
+                total, number = previous or (None, None)
+                result.append((self._merge('sum', total, next(values)),
+                               self._merge('sum', number, next(values))))
+            else:
+                result.append(self._merge(name, previous, next(values)))
+
+        self._result = result
+        if mark is not None:
+            self._mark = mark
+
+        return count
+
+    @property
+    def mark(self):
+        """Return high-water mark of key; None before first refresh."""
+        return self._mark
+
+    @property
+    def values(self):
+        """
+        Return the current result; query is executed on first access.
+
+        Rows are returned for row-wise query, tuple of aggregates
+        (or single aggregate) for aggregate query.
+        """
+        if self._result is None:
+            self.refresh()
+
+        if self._partials is None:
+            return list(self._result)
+
+        values = []
+        for name, value in zip(self._partials, self._result):
+            if name == 'mean':
+                total, number = value
+                value = total / number if number else None
+
+            values.append(value)
+
+        return values[0] if len(values) == 1 else tuple(values)
+
+
 class _QDataFrame(Query, Source, RdbmsMixin):
     """
     Query Data Frame is SQL query managed like Pandas DataFrame.
@@ -519,12 +2362,41 @@ class _QDataFrame(Query, Source, RdbmsMixin):
     __slots__ = ()
 
     def attributes(self, alias=None):
-        """Return available attributes."""
+        """
+        Return available attributes.
+
+        Attributes of the DataFrame used as source are
+        original attributes of subquery with 'alias'.
+        """
+        if alias is not None:
+            cls = _inheritor(_Attribute, self.ID)
+            return OrderedDict((name, cls.original(name, source=alias))
+                               for name in self.columns)
+
         if self._attrs is None:
             return self._source[0].attributes(self._source[1])
 
         return self._attrs
 
+    def tables(self, alias=None):
+        """Return display name of subquery without original table."""
+        return {alias: None} if alias else {}
+
+    def optimize(self, alias, leaves):
+        """Return subquery which selects only used columns."""
+        names = {leaf._expr for leaf in leaves if leaf._source == alias}
+        if self._distinct or not names or isinstance(self._attrs, str):
+            return (self, alias)
+
+        attrs = OrderedDict((name, attr)
+                            for name, attr in self.attributes().items()
+                            if name in names)
+        return (self.copy_with(attrs=attrs), alias)
+
+    def __str__(self):
+        """Return display subquery in 'FROM' statement."""
+        return '(%s)' % self.statement()
+
     @property
     def iloc(self):
         """Purely integer-location based indexing for selection by position."""
@@ -532,21 +2404,126 @@ class _QDataFrame(Query, Source, RdbmsMixin):
 
     @property
     def values(self):
-        """Return a tuples representation of the DataFrame."""
-        return self._schema.fetchall(self.query())
+        """
+        Return a tuples representation of the DataFrame.
+
+        Iterator of rows is returned if result is larger than
+        'Schema.max_result_bytes' and 'Schema.large_result' is 'stream'.
+        """
+        return self._schema._fetch_result(self)
+
+    @property
+    def columns(self):
+        """Return column labels of the DataFrame."""
+        return [alias for alias in self.attributes().keys()]
+
+    @property
+    def shape(self):
+        """Return a tuple representing the dimensionality of the DataFrame."""
+        width = len(self.columns)
+        query = 'SELECT COUNT(*) FROM (%s);' % self.statement()
+        height = self._schema.fetchall(query, cache=True)[0][0]
+        return (height, width)
+
+    def approx_shape(self, sample_size=None, seed=None):
+        """
+        Return estimated dimensionality of the DataFrame without full scan.
+
+        Number of rows of a table is taken from database statistics
+        if any (error is unknown then), otherwise it is estimated by
+        random sample of rowids with 95% confidence error.
+
+        Args:
+            sample_size (int): number of drawn rowids.
+            seed (int): seed of random generator.
+
+        Return:
+            tuple: Estimate of number of rows and number of columns.
+
+        """
+        width = len(self.columns)
+        source, _ = self._source
+        if self._where is None and isinstance(source, _OriginalTable):
+            rows = self._schema.row_estimate(str(source))
+            if rows is not None:
+                return (Estimate(rows, None), width)
+
+        return (self._estimate_rows(sample_size, seed), width)
+
+    def sample(self, n=None, frac=None, seed=None):
+        """
+        Return a random sample of rows of a table.
+
+        Sample of 'n' rows is selected by randomly drawn rowids,
+        so fewer rows are returned if rowids have gaps.
+        Sample of 'frac' rows is selected by hash of rowid in one scan.
+        Neither of them sorts table by random numbers.
+
+        Args:
+            n (int): number of rows.
+            frac (float): fraction of rows.
+            seed (int): seed of random generator.
+
+        Return:
+            QDataFrame: sampled rows.
+
+        """
+        if (n is None) == (frac is None):
+            raise ValueError('either n or frac should be specified')
+
+        if n is not None:
+            sample, _, _ = self._draw(n, seed)
+            return sample
+
+        rowid = self._rowid()
+        cls = rowid.__class__
+
+        def xor(left, right):
+            return cls((cls.sub, cls((cls.bitor, left, right)),
+                        cls((cls.bitand, left, right))))
+
+        # Rounds of 31-bit xorshift-multiply hash; products of 31-bit
+        # numbers do not overflow 64-bit integers of database.
+        hashed = xor(cls((cls.bitand, rowid, self.HASH_MASK)),
+                     self._mix_seed(seed or 0))
+        for bits, factor in self.HASH_ROUNDS:
+            hashed = cls((cls.bitand,
+                          cls((cls.mul,
+                               xor(hashed, cls((cls.rshift, hashed, bits))),
+                               factor)),
+                          self.HASH_MASK))
+
+        threshold = int(frac * (self.HASH_MASK + 1))
+        return self._restrict(cls((cls.lt, hashed, threshold)))
+
+    HASH_MASK = 0x7fffffff
+
+    HASH_ROUNDS = ((16, 0x45d9f3b), (15, 0x2c1b3c6d))
+
+    @classmethod
+    def _mix_seed(cls, seed):
+        """Return 31-bit hash of seed, so seeds select unrelated rows."""
+        seed &= 0xffffffff
+        for bits, factor in ((16, 0x7feb352d), (15, 0x846ca68b)):
+            seed = ((seed ^ (seed >> bits)) * factor) & 0xffffffff
+
+        return (seed ^ (seed >> 16)) & cls.HASH_MASK
+
+    def resample(self, column, freq='1d', unit='s'):
+        """
+        Group rows by time buckets to aggregate them in database.
 
-    @property
-    def columns(self):
-        """Return column labels of the DataFrame."""
-        return [alias for alias in self.attributes().keys()]
+        Args:
+            column (str): label of timestamp column, ISO text or epoch.
+            freq (str): length of bucket: number and one of 's', 'min',
+                'h', 'd' or 'w' (weeks start on Monday); default '1d'.
+            unit ({'s', 'ms'}): unit of epoch numbers; default 's'.
 
-    @property
-    def shape(self):
-        """Return a tuple representing the dimensionality of the DataFrame."""
-        width = len(self.columns)
-        qdf = self.copy_with(attrs='COUNT(*)')
-        height = qdf.values[0][0]
-        return (height, width)
+        Return:
+            _Resampler: buckets to aggregate.
+
+        """
+        return _Resampler(self, column, freq, unit)
 
     def head(self, n=5):
         """Return the first n rows."""
@@ -575,7 +2552,7 @@ class _QDataFrame(Query, Source, RdbmsMixin):
             return _inheritor(_QSeries, self.ID)(**params)
 
         if isinstance(key, _QSeries):
-            return self.copy_with(where=list(key._attrs.values())[0])
+            return self._restrict(list(key._attrs.values())[0])
 
         raise TypeError('unsupported key type: %s' % key.__class__.__name__)
 
@@ -590,43 +2567,218 @@ class _QDataFrame(Query, Source, RdbmsMixin):
 
         return self.copy_with(attrs=attrs)
 
-    def merge(self, right, how='inner', on=None):
+    def search(self, text, limit=None):
+        """
+        Return rows matched by full-text query with relevance score.
+
+        Matches are looked up in full-text index of the table
+        (see 'Schema.create_fulltext_index') and joined by row identifier.
+
+        Args:
+            text (str): full-text query.
+            limit (int): number of the most relevant matches; default all.
+
+        Return:
+            QDataFrame: matched rows with column 'score' ordered
+                from the best match, lower score is better.
+
+        """
+        rowid = self._rowid()
+        source, alias = self._source
+        index = self._schema.fulltext_index(source._name)
+        match = _inheritor(_FullTextMatch, self.ID)(index, text, limit)
+        match_alias = self._schema.new_alias(source.tables(alias))
+        match_attrs = match.attributes(match_alias)
+        joined_source = _inheritor(_JoinedTable, self.ID)(
+            left=self._source,
+            right=(match, match_alias),
+            on=((rowid, match_attrs['docid']),),
+            how='inner'
+        )
+        attrs = OrderedDict(self.attributes())
+        attrs['score'] = match_attrs['score']
+        return self.copy_with(attrs=attrs, source=(joined_source, None),
+                              order=(match_attrs['score'],))
+
+    def pivot_table(self, index, columns, values=None, aggfunc='sum',
+                    fill_value=None, dropna=True):
+        """
+        Create a spreadsheet-style pivot table with one grouping query.
+
+        Distinct labels of 'columns' are looked up first, then each of
+        them is aggregated by conditional expression in a single scan.
+
+        Args:
+            index (str or list of str): labels of columns to group rows by.
+            columns (str): label of column which values become columns.
+            values (str): label of column to aggregate; rows are counted
+                if None.
+            aggfunc ({'sum', 'mean', 'min', 'max', 'count'}): aggregation;
+                default 'sum'.
+            fill_value: value to replace missing aggregates with.
+            dropna (bool): skip rows with NULL in 'index' or 'columns'
+                if True, otherwise NULL index is a group of its own;
+                default True.
+
+        Return:
+            Table: index columns and aggregate of each label of 'columns'.
+
+        """
+        index = [index] if isinstance(index, str) else list(index)
+        if aggfunc not in ('sum', 'mean', 'min', 'max', 'count'):
+            raise ValueError('unknown aggregation: %r' % aggfunc)
+
+        if values is None and aggfunc != 'count':
+            raise ValueError('values are required for %r' % aggfunc)
+
+        unknown = set(index + [columns] + [values] * (values is not None)) \
+            - set(self.columns)
+        if unknown:
+            raise ValueError('unknown columns: %s' % sorted(unknown))
+
+        cls = _inheritor(_Attribute, self.ID)
+        column = cls.quote(columns)
+        statement = self.statement()
+        query = 'SELECT DISTINCT %(c)s FROM (%(q)s) WHERE %(c)s IS NOT NULL' \
+                ' ORDER BY %(c)s;' % {'c': column, 'q': statement}
+        labels = [label for label, in self._schema.fetchall(query)]
+
+        value = '1' if values is None else cls.quote(values)
+        aggregates = []
+        for label in labels:
+            expr = getattr(cls, aggfunc)(
+                'CASE WHEN %s = %s THEN %s END'
+                % (column, cls.literal(label), value)
+            )
+            if fill_value is not None:
+                expr = 'COALESCE(%s, %s)' % (expr, cls.literal(fill_value))
+
+            aggregates.append(expr)
+
+        keys = ', '.join(cls.quote(label) for label in index)
+        where = ''
+        if dropna:
+            where = ' WHERE ' + ' AND '.join(
+                '%s IS NOT NULL' % cls.quote(label)
+                for label in index + [columns]
+            )
+
+        query = 'SELECT %s FROM (%s)%s GROUP BY %s ORDER BY %s;' % (
+            ', '.join([keys] + aggregates), statement, where, keys, keys
+        )
+        return Table(*self._schema.fetchall(query),
+                     columns=index + [str(label) for label in labels])
+
+    def _as_source(self, taken):
+        """
+        Return the DataFrame as source to join it and its attributes.
+
+        Plain selection of table columns is joined as table, otherwise
+        the DataFrame is joined as subquery. Source is aliased if its name
+        is already taken.
+
+        Args:
+            taken (set of str): display names of sources in query.
+
+        """
+        source, alias = self._source
+        attrs = self.attributes()
+        plain = isinstance(source, _OriginalTable) \
+            and self._where is None \
+            and not self._distinct \
+            and self._start is None and self._stop is None \
+            and all(isinstance(attr._expr, str) for attr in attrs.values())
+        name = (alias or str(source)).split('.')[-1]
+        if plain and name not in {table.split('.')[-1] for table in taken}:
+            return self._source, attrs
+
+        alias = self._schema.new_alias(taken)
+        if not plain:
+            return (self, alias), self.attributes(alias)
+
+        cls = _inheritor(_Attribute, self.ID)
+        return (source, alias), OrderedDict(
+            (label, cls.original(attr._expr, source=alias))
+            for label, attr in attrs.items()
+        )
+
+    def merge(self, right, how='inner', on=None, left_on=None, right_on=None,
+              suffixes=('_x', '_y')):
         """
         Merge QDataFrame objects with a database-style join.
 
+        Right object is joined under alias if its table name is already
+        in the query (e.g. self-join or join of shards), filtered or
+        computed right object is joined as subquery.
+
         Args:
             right (QDataFrame): object to join.
             how ({‘left’, ‘right’, ‘outer’, ‘inner’}): default ‘inner’.
-            on (str): label of column.
+            on (str or list of str): labels of columns to join on;
+                default all common columns.
+            left_on (str or list of str): labels of left columns to join on.
+            right_on (str or list of str): labels of right columns
+                to join on.
+            suffixes (tuple of str): suffixes of overlapping labels
+                of left and right columns; default ('_x', '_y').
 
         Return:
             QDataFrame: merged object
 
         """
         lattrs = self.attributes()
-        rattrs = right.attributes()
-
-        common_names = lattrs.keys() & rattrs.keys()
-        if on and on not in common_names:
-            raise ValueError('column %r is not in both frames' % on)
+        rlabels = list(right.attributes())
 
-        if len(common_names) == 1:
+        common_names = lattrs.keys() & set(rlabels)
+        if left_on is None and right_on is None:
             if on is None:
-                on = common_names.pop()
+                on = [label for label in lattrs if label in common_names]
+                if not on:
+                    raise ValueError('no common columns to merge on')
 
-        else:
-            # TODO: rename overlap columns with suffixes
-            raise ValueError('columns overlap %s' % list(common_names - {on}))
+            on = [on] if isinstance(on, str) else list(on)
+            for label in on:
+                if label not in common_names:
+                    raise ValueError('column %r is not in both frames' % label)
+
+            left_on = right_on = on
+
+        elif on is not None or left_on is None or right_on is None:
+            raise ValueError('specify either on or both left_on and right_on')
+
+        left_on = [left_on] if isinstance(left_on, str) else list(left_on)
+        right_on = [right_on] if isinstance(right_on, str) else list(right_on)
+        if len(left_on) != len(right_on):
+            raise ValueError('left_on and right_on should have same length')
 
-        ron = rattrs.pop(on)
+        alien_keys = (set(left_on) - lattrs.keys()) \
+            | (set(right_on) - set(rlabels))
+        if alien_keys:
+            raise ValueError('unknown keys: %s' % list(alien_keys))
+
+        taken = set(self._source[0].tables(self._source[1]))
+        rsource, rattrs = right._as_source(taken)
+
+        shared = {lkey for lkey, rkey in zip(left_on, right_on)
+                  if lkey == rkey}
+        rlabels = [label for label in rlabels if label not in shared]
+        overlap = lattrs.keys() & set(rlabels)
         attrs = OrderedDict()
-        attrs.update(lattrs)
-        attrs.update(rattrs)
+        for label, attr in lattrs.items():
+            attrs[label + suffixes[0] if label in overlap else label] = attr
+
+        for label in rlabels:
+            attrs[label + suffixes[1] if label in overlap else label] = \
+                rattrs[label]
+
+        if len(attrs) < len(lattrs) + len(rlabels):
+            raise ValueError('columns overlap with suffixes %s' % (suffixes,))
 
         joined_source = _inheritor(_JoinedTable, self.ID)(
             left=self._source,
-            right=right._source,
-            on=(lattrs[on], ron),
+            right=rsource,
+            on=tuple((lattrs[lkey], rattrs[rkey])
+                     for lkey, rkey in zip(left_on, right_on)),
             how=how
         )
         return self.copy_with(attrs=attrs, source=(joined_source, None))
@@ -638,17 +2790,155 @@ class _QDataFrame(Query, Source, RdbmsMixin):
                              if alias not in columns])
         return self.copy_with(attrs=attrs)
 
+    def to_table(self, name, schema=None, if_exists='fail', batch_size=None):
+        """
+        Write rows of the DataFrame to table.
+
+        Rows are copied with 'INSERT INTO ... SELECT' inside database
+        if target schema shares the connection, otherwise they are streamed
+        by batches into target schema in a single transaction.
+
+        Args:
+            name (str): target table name.
+            schema (_Schema): target schema; default schema of the DataFrame.
+            if_exists ({'fail', 'replace', 'append'}): behavior if table
+                already exists; default 'fail'.
+            batch_size (int): number of rows fetched and inserted at once.
+
+        Return:
+            QDataFrame: written table.
+
+        """
+        schema = schema or self._schema
+        if schema.conn is not self._schema.conn:
+            rows = self._schema.iterrows(self.query(), batch_size)
+            return schema.from_records(name, rows, self.columns,
+                                       if_exists=if_exists,
+                                       batch_size=batch_size)
+
+        with schema.transaction() as cursor:
+            if schema._prepare_table(cursor, name, if_exists):
+                cursor.execute('INSERT INTO %s (%s) %s;' % (
+                    name, ', '.join(self.columns), self.statement()
+                ))
+
+            else:
+                cursor.execute('CREATE TABLE %s AS %s;' % (
+                    name, self.statement()
+                ))
+
+        return schema[name]
+
+    def to_csv(self, path_or_file, sep=',', header=True,
+               compression='infer', batch_size=None):
+        """
+        Write rows of the DataFrame to CSV file.
+
+        Rows are streamed from cursor by batches, so memory usage
+        does not depend on number of rows. Blobs are written as base64
+        strings like in 'to_jsonl'.
+
+        Args:
+            path_or_file (str or file-like object): target file.
+            sep (str): field delimiter; default ','.
+            header (bool): write column names if True; default True.
+            compression ({'infer', 'gzip', 'bz2', 'xz', None}): compression
+                of file; 'infer' detects it by path extension.
+            batch_size (int): number of rows fetched at once.
+
+        """
+        with open_text(path_or_file, 'w', compression) as file:
+            writer = csv.writer(file, delimiter=sep)
+            if header:
+                writer.writerow(self.columns)
+
+            writer.writerows(
+                [_encode_blob(value) for value in row]
+                for row in self._schema.iterrows(self.query(), batch_size)
+            )
+
+    def to_jsonl(self, path_or_file, compression='infer', batch_size=None):
+        """
+        Write rows of the DataFrame to JSON Lines file.
+
+        Each row is written as JSON object with column labels as keys,
+        blobs are written as base64 strings. Rows are streamed from
+        cursor by batches.
+
+        Args:
+            path_or_file (str or file-like object): target file.
+            compression ({'infer', 'gzip', 'bz2', 'xz', None}): compression
+                of file; 'infer' detects it by path extension.
+            batch_size (int): number of rows fetched at once.
+
+        """
+        columns = self.columns
+        with open_text(path_or_file, 'w', compression) as file:
+            for row in self._schema.iterrows(self.query(), batch_size):
+                file.write(json.dumps(dict(zip(columns, row)),
+                                      default=_encode_json) + '\n')
+
+    def _profile(self):
+        """
+        Profile columns of the DataFrame with one aggregate query.
+
+        Return:
+            tuple: number of rows and list of tuples with non-null count,
+                size in bytes and storage classes histogram of each column.
+
+        """
+        cls = _inheritor(_Attribute, self.ID)
+        exprs = ['COUNT(*)']
+        for alias in self.columns:
+            column = cls.quote(alias)
+            exprs.append(cls.count(column))
+            exprs.append(cls.nbytes(column))
+            exprs.extend(cls.sum(cls.eq(cls.typeof(column), cls.literal(kind)))
+                         for kind in cls.STORAGE_CLASSES)
+
+        query = 'SELECT %s FROM (%s);' % (', '.join(exprs), self.statement())
+        row = self._schema.fetchall(query)[0]
+        step = 2 + len(cls.STORAGE_CLASSES)
+        return row[0], [
+            (row[i], row[i + 1] or 0,
+             dict(zip(cls.STORAGE_CLASSES, row[i + 2:i + step])))
+            for i in range(1, len(row), step)
+        ]
+
+    @property
     def dtypes(self):
-        """Return the dtypes in the DataFrame."""
-        raise NotImplementedError
+        """
+        Return the dtypes in the DataFrame.
+
+        Declared types are taken from catalog of database,
+        None is returned for computed columns.
+        """
+        tables = self._source[0].tables(self._source[1])
+        declared = {}
+        dtypes = []
+        for attr in self.attributes().values():
+            table = tables.get(attr._source)
+            if table is None or not isinstance(attr._expr, str):
+                dtypes.append(None)
+                continue
+
+            if table not in declared:
+                declared[table] = self._schema.declared_types(table)
+
+            dtypes.append(declared[table].get(attr._expr))
+
+        return Column(dtypes, name='dtype')
 
     def count(self):
-        """Count non-Null cells for each column or row."""
-        raise NotImplementedError
+        """Count non-Null cells for each column."""
+        _, profile = self._profile()
+        return Column([count for count, _, _ in profile], name='count')
 
-    def memeory_usage(self):
+    def memory_usage(self):
         """Return the memory usage of each column in bytes."""
-        raise NotImplementedError
+        _, profile = self._profile()
+        return Column([nbytes for _, nbytes, _ in profile],
+                      name='memory_usage')
 
     def info(self):
         """
@@ -656,12 +2946,27 @@ class _QDataFrame(Query, Source, RdbmsMixin):
 
         This method prints information about a DataFrame
         including the index dtype and columns, non-null values
-        and memory usage.
+        and memory usage. Columns are scanned only once.
+        Computed columns without declared type are described by
+        most frequent storage class of values.
         """
-        print(Table(self.columns, self.count(), self.dtypes),
-              columns=["Column", "Non-Null Count", "Dtype"])
-        # TODO: set of data types and frequency
-        print("memory usage: %s+ bytes" % self.memory_usage())
+        rows, profile = self._profile()
+        dtypes = [dtype or (max(hist, key=hist.get) if hist else '')
+                  for dtype, (_, _, hist) in zip(self.dtypes, profile)]
+        print("%s entries, %s columns" % (rows, len(profile)))
+        print(Table(self.columns,
+                    ['%s non-null' % count for count, _, _ in profile],
+                    dtypes,
+                    columns=["Column", "Non-Null Count", "Dtype"],
+                    transpose=True))
+        frequency = OrderedDict()
+        for dtype in dtypes:
+            frequency[dtype] = frequency.get(dtype, 0) + 1
+
+        print("dtypes: %s" % ', '.join('%s(%s)' % item
+                                       for item in frequency.items()))
+        print("memory usage: %s+ bytes"
+              % sum(nbytes for _, nbytes, _ in profile))
 
 
 class _QSeries(Query, RdbmsMixin):
@@ -671,22 +2976,18 @@ class _QSeries(Query, RdbmsMixin):
 
     def function(fun):
         """Decorate attribute expression for aggregate function."""
-        def wrapper(self, *args):
+        def wrapper(self, *args, approx=False, **options):
+            if approx:
+                return self._approximate(fun.__name__, *args, **options)
+
+            if options:
+                raise TypeError("unexpected arguments: %s" % list(options))
+
             alias, attr = list(self._attrs.items())[0]
             method = getattr(attr, fun.__name__.strip('_'))
 
             if len(args) == 1:
-                other = args[0]
-                if isinstance(other, _QSeries):
-                    difference = set(self.difference(other)) - {'attrs'}
-                    if len(difference) == 0:
-                        _, other = list(other._attrs.items())[0]
-
-                    else:
-                        raise ValueError("too more difference: %s" %
-                                         difference.keys())
-
-                expr = (method, attr, other)
+                expr = (method, attr, self._operand(args[0]))
 
             elif len(args) == 0:
                 expr = (method, attr)
@@ -699,16 +3000,248 @@ class _QSeries(Query, RdbmsMixin):
 
         return wrapper
 
+    def _operand(self, other):
+        """Return attribute of other series over same rows or constant."""
+        if isinstance(other, _QSeries):
+            difference = set(self.difference(other)) - {'attrs'}
+            if len(difference) > 0:
+                raise ValueError("too more difference: %s" % difference)
+
+            _, other = list(other._attrs.items())[0]
+
+        return other
+
+    def _window(self, order=None, groupby=None, *partition):
+        """
+        Return window specification over rows of series.
+
+        Args:
+            order (QSeries or _Attribute): ordering of rows;
+                default rowid of source table.
+            groupby (QSeries or list of QSeries): partitioning of rows.
+            *partition (_Attribute): extra partitioning attributes.
+
+        """
+        if order is None:
+            order = self._rowid()
+
+        if groupby is None:
+            groupby = []
+        elif isinstance(groupby, _QSeries):
+            groupby = [groupby]
+
+        cls = _inheritor(_Attribute, self.ID)
+        partition = [self._operand(key) for key in groupby] + list(partition)
+        return cls((cls.window, self._operand(order), *partition))
+
+    def _with_expr(self, *expr):
+        """Return series with attribute of expression tree."""
+        alias = next(iter(self._attrs))
+        cls = _inheritor(_Attribute, self.ID)
+        return self.copy_with(attrs={alias: cls(expr)})
+
+    def cumsum(self, by=None, groupby=None):
+        """
+        Return cumulative sum computed with window function.
+
+        Args:
+            by (QSeries): ordering of rows; default rowid of table.
+            groupby (QSeries or list of QSeries): sum within groups.
+
+        """
+        attr = next(iter(self._attrs.values()))
+        return self._with_expr(attr.cumsum, attr, self._window(by, groupby))
+
+    def shift(self, periods=1, by=None, groupby=None):
+        """
+        Return values shifted by number of rows.
+
+        Args:
+            periods (int): number of rows to shift, may be negative.
+            by (QSeries): ordering of rows; default rowid of table.
+            groupby (QSeries or list of QSeries): shift within groups.
+
+        """
+        attr = next(iter(self._attrs.values()))
+        window = self._window(by, groupby)
+        if periods < 0:
+            return self._with_expr(attr.lead, attr, -periods, window)
+
+        return self._with_expr(attr.lag, attr, periods, window)
+
+    def diff(self, periods=1, by=None, groupby=None):
+        """
+        Return difference with value of previous row.
+
+        Args:
+            periods (int): number of rows to shift for difference.
+            by (QSeries): ordering of rows; default rowid of table.
+            groupby (QSeries or list of QSeries): diff within groups.
+
+        """
+        attr = next(iter(self._attrs.values()))
+        shifted = self.shift(periods, by, groupby)
+        return self._with_expr(attr.sub, attr, self._operand(shifted))
+
+    def rank(self, method='average', ascending=True, groupby=None):
+        """
+        Compute numerical rank of values, NULL values are not ranked.
+
+        Args:
+            method ({'average', 'min', 'max', 'first', 'dense'}): rank
+                of group of equal values; 'first' ranks them by rowid.
+            ascending (bool): rank smallest value as 1 if True.
+            groupby (QSeries or list of QSeries): rank within groups.
+
+        """
+        attr = next(iter(self._attrs.values()))
+        cls = attr.__class__
+        notnull = cls((cls.notnull, attr))
+        order = attr if ascending else cls((cls.desc, attr))
+        if method == 'first':
+            order = cls((cls.keys, order, self._rowid()))
+
+        window = self._window(order, groupby, notnull)
+        if method in ('min', 'dense', 'first'):
+            fun = {'min': cls.rank,
+                   'dense': cls.dense_rank,
+                   'first': cls.row_number}[method]
+            rank = cls((fun, window))
+
+        elif method in ('max', 'average'):
+            partition = window._expr[2:] + (attr,)
+            peers = cls((cls.sub, cls((cls.peers,
+                                       cls((cls.partition, *partition)))), 1))
+            if method == 'average':
+                peers = cls((cls.div, peers, 2.0))
+
+            rank = cls((cls.add, cls((cls.rank, window)), peers))
+
+        else:
+            raise ValueError('unknown rank method: %r' % method)
+
+        return self._with_expr(cls.when, notnull, rank)
+
+    @property
+    def str(self):
+        """Return accessor of string functions computed in database."""
+        return _StringMethods(self)
+
+    def rolling(self, window, min_periods=None, by=None, groupby=None):
+        """
+        Provide rolling window calculations.
+
+        Args:
+            window (int): number of rows in moving window.
+            min_periods (int): minimum number of non-NULL values in window
+                required to have a value; default size of window.
+            by (QSeries): ordering of rows; default rowid of table.
+            groupby (QSeries or list of QSeries): roll within groups.
+
+        """
+        return _Rolling(self, window, min_periods, self._window(by, groupby))
+
+    def isna(self):
+        """Return series of whether values are NULL."""
+        attr = next(iter(self._attrs.values()))
+        return self._with_expr(attr.isnull, attr)
+
+    def notna(self):
+        """Return series of whether values are not NULL."""
+        attr = next(iter(self._attrs.values()))
+        return self._with_expr(attr.notnull, attr)
+
+    def fillna(self, value):
+        """
+        Replace NULL values.
+
+        Args:
+            value: constant or series over same rows.
+
+        """
+        attr = next(iter(self._attrs.values()))
+        return self._with_expr(attr.coalesce, attr, self._operand(value))
+
+    def clip(self, lower=None, upper=None):
+        """
+        Trim values at thresholds, NULL values stay NULL.
+
+        Args:
+            lower: minimum threshold value or series; None is no threshold.
+            upper: maximum threshold value or series; None is no threshold.
+
+        """
+        series = self
+        for bound, fun in ((lower, 'greatest'), (upper, 'least')):
+            if bound is not None:
+                attr = next(iter(series._attrs.values()))
+                series = series._with_expr(getattr(attr, fun), attr,
+                                           self._operand(bound))
+
+        return series
+
+    def astype(self, dtype):
+        """
+        Cast values to type.
+
+        Args:
+            dtype (type or str): python type of 'Schema.TYPES'
+                or name of database type.
+
+        """
+        type_name = self._schema.TYPES.get(dtype, dtype)
+        if not isinstance(type_name, str):
+            raise ValueError('unknown type: %r' % dtype)
+
+        attr = next(iter(self._attrs.values()))
+        return self._with_expr(attr.cast(type_name.upper()), attr)
+
+    def where(self, cond, other=None):
+        """
+        Replace values where the condition is not True.
+
+        Args:
+            cond (QSeries): condition over same rows; NULL is not True.
+            other: replacement value or series; default NULL.
+
+        """
+        attr = next(iter(self._attrs.values()))
+        condition = self._operand(cond)
+        if other is None:
+            return self._with_expr(attr.when, condition, attr)
+
+        return self._with_expr(attr.choose, condition, attr,
+                               self._operand(other))
+
+    def map(self, func, deterministic=True):
+        """
+        Map values by Python function called in database.
+
+        Args:
+            func (callable): function of value.
+            deterministic (bool): function returns same result for same
+                value, so database may optimize calls.
+
+        """
+        return _Function(self._schema, func, False, deterministic)(self)
+
+    def apply(self, func, deterministic=True):
+        """Apply Python function to values in database, see 'map'."""
+        return self.map(func, deterministic)
+
     def __getitem__(self, key):
         if isinstance(key, _QSeries):
-            return self.copy_with(where=list(key._attrs.values())[0])
+            return self._restrict(list(key._attrs.values())[0])
 
         raise TypeError('unsupported key type: %s' % key.__class__.__name__)
 
     @property
     def values(self):
         """Return a tuples representation of the DataFrame."""
-        rows = self._schema.fetchall(self.query())
+        rows = self._schema._fetch_result(self)
+        if not isinstance(rows, list):
+            return (row[0] for row in rows)
+
         values = list(zip(*rows))[0]
         if len(values) == 1:
             return values[0]
@@ -724,6 +3257,257 @@ class _QSeries(Query, RdbmsMixin):
     def __float__(self):
         return float(self.values)
 
+    @property
+    def name(self):
+        """Return label of the Series."""
+        return next(iter(self._attrs))
+
+    def _column(self):
+        """Return display expression of the Series column in subquery."""
+        return _inheritor(_Attribute, self.ID).quote(self.name)
+
+    def _approximate(self, name, sample_size=None, seed=None):
+        """
+        Estimate aggregate function by random sample of rowids.
+
+        Return:
+            Estimate: value with 95% confidence error.
+
+        """
+        if name not in ('sum', 'mean'):
+            raise ValueError('approximation of %r is not supported' % name)
+
+        sample, drawn, population = self._draw(
+            sample_size or self.SAMPLE_SIZE, seed
+        )
+        column = self._column()
+        query = 'SELECT COUNT(%(c)s), SUM(%(c)s), SUM(%(c)s * %(c)s) ' \
+                'FROM (%(q)s);' % {'c': column, 'q': sample.statement()}
+        count, total, squares = self._schema.fetchall(query)[0]
+        total, squares = total or 0, squares or 0
+        if name == 'mean':
+            if count == 0:
+                return Estimate(None, None)
+
+            mean = total / count
+            deviation = math.sqrt(max(squares / count - mean ** 2, 0))
+            error = self._confidence(count, count * population / drawn)
+            return Estimate(mean, deviation * error)
+
+        if drawn == 0:
+            return Estimate(0, 0)
+
+        mean = total / drawn
+        deviation = math.sqrt(max(squares / drawn - mean ** 2, 0))
+        error = self._confidence(drawn, population)
+        return Estimate(population * mean, population * deviation * error)
+
+    def value_counts(self, normalize=False, dropna=True, top=None,
+                     approx=False, sample_size=None, seed=None):
+        """
+        Return counts of unique values in descending order.
+
+        Only unique values and their counts are fetched.
+        Approximate counts are computed on random sample of rowids
+        and reported with 95% confidence error.
+
+        Args:
+            normalize (bool): return relative frequencies if True.
+            dropna (bool): don't include counts of NULL if True.
+            top (int): return only 'top' most frequent values.
+            approx (bool): estimate counts by sample if True.
+            sample_size (int): number of drawn rowids if 'approx'.
+            seed (int): seed of random generator if 'approx'.
+
+        Return:
+            Table: unique values, their counts and errors if 'approx'.
+
+        """
+        if approx:
+            sample, drawn, population = self._draw(
+                sample_size or self.SAMPLE_SIZE, seed
+            )
+            counts = sample.value_counts(dropna=dropna, top=top)
+            if normalize:
+                query = 'SELECT COUNT(%s) FROM (%s);' % (
+                    self._column() if dropna else '*', sample.statement()
+                )
+                size = self._schema.fetchall(query)[0][0]
+                scale = 1 / size if size else 0
+                error = self._confidence(size, size * population / drawn) \
+                    if size else 0
+            else:
+                size = drawn
+                scale = population / drawn if drawn else 0
+                error = population * self._confidence(drawn, population) \
+                    if drawn else 0
+
+            values = [(value, count * scale,
+                       error * math.sqrt(count / size * (1 - count / size)))
+                      for value, count in counts.values]
+            return Table(*values, columns=[
+                self.name, 'proportion' if normalize else 'count', 'error'
+            ])
+
+        column = self._column()
+        count = 'COUNT(*)'
+        if normalize:
+            count = '%s * 1.0 / SUM(%s) OVER ()' % (count, count)
+
+        query = 'SELECT %s, %s FROM (%s)' % (column, count, self.statement())
+        if dropna:
+            query += ' WHERE %s IS NOT NULL' % column
+
+        query += ' GROUP BY %s ORDER BY COUNT(*) DESC' % column
+        if top is not None:
+            query += ' LIMIT %d' % top
+
+        return Table(*self._schema.fetchall(query + ';'),
+                     columns=[self.name,
+                              'proportion' if normalize else 'count'])
+
+    def nunique(self, dropna=True):
+        """Return number of unique values; count NULL if not 'dropna'."""
+        column = self._column()
+        expr = 'COUNT(DISTINCT %s)' % column
+        if not dropna:
+            expr += ' + MAX(%s IS NULL)' % column
+
+        query = 'SELECT %s FROM (%s);' % (expr, self.statement())
+        return self._schema.fetchall(query)[0][0] or 0
+
+    def quantile(self, q=0.5):
+        """
+        Return value at the given quantile with linear interpolation.
+
+        All quantiles are computed within one sorted pass, only values
+        around requested positions are fetched. NULL values are skipped.
+
+        Args:
+            q (float or list of float): quantile(s) between 0 and 1.
+
+        Return:
+            float or Column: quantile value(s).
+
+        """
+        quantiles = [q] if isinstance(q, (int, float)) else list(q)
+        if any(not 0 <= value <= 1 for value in quantiles):
+            raise ValueError('quantiles should be between 0 and 1')
+
+        column = self._column()
+        positions = ' OR '.join(
+            'i BETWEEN CAST((n - 1) * %(q)r AS INTEGER)'
+            ' AND CAST((n - 1) * %(q)r AS INTEGER) + 1' % {'q': float(value)}
+            for value in quantiles
+        )
+        query = (
+            'SELECT i, x, n FROM ('
+            'SELECT %(c)s AS x, ROW_NUMBER() OVER (ORDER BY %(c)s) - 1 AS i,'
+            ' COUNT(*) OVER () AS n FROM (%(q)s) WHERE %(c)s IS NOT NULL'
+            ') WHERE %(p)s;' % {'c': column, 'q': self.statement(),
+                                'p': positions}
+        )
+        rows = self._schema.fetchall(query)
+        values = dict((i, x) for i, x, _ in rows)
+        result = []
+        for value in quantiles:
+            if not rows:
+                result.append(None)
+                continue
+
+            position = (rows[0][2] - 1) * float(value)
+            lower = int(position)
+            upper = min(lower + 1, rows[0][2] - 1)
+            result.append(values[lower] + (values[upper] - values[lower])
+                          * (position - lower))
+
+        if isinstance(q, (int, float)):
+            return result[0]
+
+        return Column(result, name=self.name)
+
+    def median(self):
+        """Return the median of the values for column."""
+        return self.quantile(0.5)
+
+    def histogram(self, bins=10):
+        """
+        Count values in bins with one grouping query.
+
+        Equal-width bins span range of values and are computed by
+        integer division, explicit edges are matched by 'CASE'.
+        Values outside of explicit edges and NULL are not counted,
+        right edge of the last bin is included.
+
+        Args:
+            bins (int or list of numbers): number of equal-width bins
+                or ascending bin edges.
+
+        Return:
+            Table: left and right edges and count of values of each bin.
+
+        """
+        if isinstance(bins, int):
+            if bins < 1:
+                raise ValueError('number of bins should be positive')
+        else:
+            bins = list(bins)
+            if len(bins) < 2 or any(left >= right
+                                    for left, right in zip(bins, bins[1:])):
+                raise ValueError('bin edges should be at least two '
+                                 'ascending numbers')
+
+        column = self._column()
+        values = 'SELECT %(c)s AS x FROM (%(q)s) WHERE %(c)s IS NOT NULL' % {
+            'c': column, 'q': self.statement()
+        }
+        if isinstance(bins, int):
+            query = (
+                'WITH v AS (%(v)s), '
+                'b AS (SELECT MIN(x) AS lo, (MAX(x) - MIN(x)) * 1.0 / %(n)d'
+                ' AS w FROM v) '
+                'SELECT CASE WHEN w > 0'
+                ' THEN MIN(CAST((x - lo) / w AS INTEGER), %(n)d - 1)'
+                ' ELSE 0 END AS k, COUNT(*), lo, w FROM v, b'
+                ' GROUP BY k;' % {'v': values, 'n': bins}
+            )
+            rows = self._schema.fetchall(query)
+            if not rows:
+                return Table(columns=['left', 'right', 'count'])
+
+            counts = {k: count for k, count, _, _ in rows}
+            _, _, low, width = rows[0]
+            edges = [low + width * k for k in range(bins + 1)]
+
+        else:
+            edges = bins
+            bin_expr = '0'
+            if len(edges) > 2:
+                bin_expr = 'CASE %s ELSE %d END' % (
+                    ' '.join('WHEN x < %r THEN %d' % (edge, k)
+                             for k, edge in enumerate(edges[1:-1])),
+                    len(edges) - 2
+                )
+
+            query = (
+                'SELECT %(k)s AS k, COUNT(*)'
+                ' FROM (%(v)s) WHERE x >= %(lo)r AND x <= %(hi)r'
+                ' GROUP BY k;' % {'k': bin_expr, 'v': values,
+                                  'lo': edges[0], 'hi': edges[-1]}
+            )
+            counts = dict(self._schema.fetchall(query))
+
+        return Table(*((edges[k], edges[k + 1], counts.get(k, 0))
+                       for k in range(len(edges) - 1)),
+                     columns=['left', 'right', 'count'])
+
+    def unique(self):
+        """Return unique values of the Series."""
+        query = 'SELECT DISTINCT %s FROM (%s);' % (self._column(),
+                                                   self.statement())
+        return Column([value for value, in self._schema.fetchall(query)],
+                      name=self.name)
+
     @function
     def sum(self):
         """Return the sum of the values for column."""
@@ -744,6 +3528,14 @@ class _QSeries(Query, RdbmsMixin):
     def __add__(self, other):
         pass
 
+    @function
+    def __mul__(self, other):
+        pass
+
+    @function
+    def __mod__(self, other):
+        pass
+
     @function
     def __sub__(self, other):
         pass
@@ -0,0 +1,442 @@
+# -*- coding: utf-8 -*-
+"""
+Persistent cache of query results.
+
+Fetched rows are stored in a compact binary columnar file which is
+reopened with 'mmap', so columns are paged in lazily and pages are
+shared by processes reading the same result.
+
+File layout:
+    magic | length of header | JSON header | aligned segments
+
+Every column has a null mask segment (byte per row) and either
+a segment of 64-bit integers or floats, or segments of offsets and
+bytes of variable length values (UTF-8 text, blobs or pickled objects
+for columns of mixed storage classes).
+
+Copyright 2020 Ilia Lazarev
+Licensed under the Apache License, Version 2.0
+"""
+
+import hashlib
+import json
+import mmap
+import os
+import pickle
+import struct
+import tempfile
+from array import array
+
+from .tools import Column, Table, chunked
+
+
+MAGIC = b'NPCACHE1'
+
+ALIGN = 8
+
+FIXED = {'int': 'q', 'float': 'd'}
+
+CODECS = {
+    'text': (lambda value: value.encode('utf-8'),
+             lambda data: str(data, 'utf-8')),
+    'blob': (bytes, bytes),
+    'object': (pickle.dumps, pickle.loads),
+}
+
+KINDS = {int: 'int', float: 'float', str: 'text', bytes: 'blob'}
+
+
+def _unify(kind, other):
+    """Return kind of column which stores values of both kinds."""
+    if kind is None or kind == other:
+        return other
+
+    if {kind, other} == {'int', 'float'}:
+        return 'float'
+
+    return 'object'
+
+
+class _ColumnWriter:
+    """Spill values of column to temporary files by batches."""
+
+    __slots__ = ('kind', 'count', '_nulls', '_data', '_offsets', '_size')
+
+    def __init__(self):
+        self.kind = None
+        self.count = 0
+        self._nulls = tempfile.TemporaryFile()
+        self._data = tempfile.TemporaryFile()
+        self._offsets = tempfile.TemporaryFile()
+        self._size = 0
+
+    def _values(self):
+        """Yield written values back by batches."""
+        self._nulls.seek(0)
+        self._data.seek(0)
+        self._offsets.seek(0)
+        previous = 0
+        while True:
+            nulls = self._nulls.read(mmap.PAGESIZE)
+            if not nulls:
+                break
+
+            if self.kind is None:
+                values = nulls
+            elif self.kind in FIXED:
+                values = array(FIXED[self.kind])
+                values.frombytes(self._data.read(len(nulls) * 8))
+            else:
+                offsets = array('q')
+                offsets.frombytes(self._offsets.read(len(nulls) * 8))
+                decode = CODECS[self.kind][1]
+                values = []
+                for offset in offsets:
+                    values.append(decode(self._data.read(offset - previous)))
+                    previous = offset
+
+            yield [None if null else value
+                   for null, value in zip(nulls, values)]
+
+    def _convert(self, kind):
+        """Rewrite written values as values of other kind."""
+        converted = _ColumnWriter()
+        converted.kind = kind
+        for values in self._values():
+            converted._write(values)
+
+        self.close()
+        for name in self.__slots__:
+            setattr(self, name, getattr(converted, name))
+
+    def _write(self, values):
+        """Append values of already known kind."""
+        self._nulls.write(bytes(value is None for value in values))
+        if self.kind is None:
+            pass
+        elif self.kind in FIXED:
+            array(FIXED[self.kind],
+                  (0 if value is None else value for value in values)
+                  ).tofile(self._data)
+        else:
+            encode = CODECS[self.kind][0]
+            offsets = array('q')
+            for value in values:
+                if value is not None:
+                    data = encode(value)
+                    self._data.write(data)
+                    self._size += len(data)
+
+                offsets.append(self._size)
+
+            offsets.tofile(self._offsets)
+
+        self.count += len(values)
+
+    def write(self, values):
+        """Append batch of values, kind of column is widened if needed."""
+        kind = self.kind
+        for value in values:
+            if value is not None:
+                kind = _unify(kind, KINDS.get(type(value), 'object'))
+
+        if kind != self.kind:
+            self._convert(kind)
+
+        self._write(values)
+
+    def segments(self):
+        """Return temporary files of null mask, data and offsets."""
+        if self.kind is None:
+            self._convert('object')
+
+        files = [self._nulls, self._data]
+        if self.kind not in FIXED:
+            files.append(self._offsets)
+
+        for file in files:
+            file.flush()
+            file.seek(0)
+
+        return files
+
+    def close(self):
+        for file in (self._nulls, self._data, self._offsets):
+            file.close()
+
+
+def write(path, columns, rows, batch_size=10000, key=None):
+    """
+    Write rows to columnar file.
+
+    Args:
+        path (str): path to file; it is replaced atomically.
+        columns (list of str): names of columns.
+        rows (iterable of sequences): rows to write.
+        batch_size (int): number of rows spilled at once.
+        key (str): key of the result stored in header.
+
+    """
+    writers = [_ColumnWriter() for _ in columns]
+    try:
+        count = 0
+        for batch in chunked(rows, batch_size):
+            for writer, values in zip(writers, zip(*batch)):
+                writer.write(values)
+
+            count += len(batch)
+
+        segments = [writer.segments() for writer in writers]
+        sizes = [[os.fstat(file.fileno()).st_size for file in files]
+                 for files in segments]
+        header = {'key': key, 'rows': count, 'columns': []}
+        # Offsets of segments are relative to aligned end of header.
+        position = 0
+        for name, writer, lengths in zip(columns, writers, sizes):
+            spans = []
+            for length in lengths:
+                spans.append([position, length])
+                position += -(-length // ALIGN) * ALIGN
+
+            header['columns'].append({
+                'name': name,
+                'kind': writer.kind,
+                'segments': spans,
+            })
+
+        encoded = json.dumps(header).encode('utf-8')
+        start = len(MAGIC) + 8 + len(encoded)
+        padding = -start % ALIGN
+        directory = os.path.dirname(os.path.abspath(path))
+        with tempfile.NamedTemporaryFile(dir=directory,
+                                         delete=False) as file:
+            file.write(MAGIC + struct.pack('<Q', len(encoded)) + encoded)
+            file.write(b'\0' * padding)
+            for files, lengths in zip(segments, sizes):
+                for segment, length in zip(files, lengths):
+                    while True:
+                        chunk = segment.read(mmap.PAGESIZE * 16)
+                        if not chunk:
+                            break
+
+                        file.write(chunk)
+
+                    file.write(b'\0' * (-length % ALIGN))
+
+        os.replace(file.name, path)
+
+    finally:
+        for writer in writers:
+            writer.close()
+
+
+class MappedColumn:
+    """Read-only sequence of column values paged in from mapped file."""
+
+    __slots__ = ('_kind', '_nulls', '_data', '_offsets')
+
+    def __init__(self, buffer, kind, segments):
+        """
+        Wrap column segments of buffer without copying.
+
+        Args:
+            buffer (memoryview): mapped file starting by first segment.
+            kind ({'int', 'float', 'text', 'blob', 'object'}): kind of values.
+            segments (list of pairs): offsets and lengths of null mask,
+                data and offsets segments.
+
+        """
+        views = [buffer[start:start + length] for start, length in segments]
+        self._kind = kind
+        self._nulls = views[0]
+        if kind in FIXED:
+            self._data = views[1].cast(FIXED[kind])
+            self._offsets = None
+        else:
+            self._data = views[1]
+            self._offsets = views[2].cast('q')
+
+    def __len__(self):
+        return len(self._nulls)
+
+    def __copy__(self):
+        return self
+
+    def _value(self, index):
+        if self._nulls[index]:
+            return None
+
+        if self._offsets is None:
+            return self._data[index]
+
+        start = self._offsets[index - 1] if index else 0
+        return CODECS[self._kind][1](self._data[start:self._offsets[index]])
+
+    def __getitem__(self, key):
+        if isinstance(key, slice):
+            return [self._value(i) for i in range(*key.indices(len(self)))]
+
+        if key < 0:
+            key += len(self)
+
+        if not 0 <= key < len(self):
+            raise IndexError('column index out of range')
+
+        return self._value(key)
+
+    def __iter__(self):
+        return (self._value(i) for i in range(len(self)))
+
+    def release(self):
+        """Release views of mapped file."""
+        for view in (self._nulls, self._data, self._offsets):
+            if view is not None:
+                view.release()
+
+
+class MappedResult:
+    """Query result stored in columnar file and mapped to memory."""
+
+    __slots__ = ('_file', '_mmap', '_buffer', '_key', '_columns')
+
+    def __init__(self, path):
+        """
+        Map columnar file to memory; values are read on access.
+
+        Args:
+            path (str): path to file written by 'write'.
+
+        """
+        self._file = open(path, 'rb')
+        self._mmap = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+        if self._mmap[:len(MAGIC)] != MAGIC:
+            self.close()
+            raise ValueError('not a nopandas cache file: %r' % path)
+
+        length, = struct.unpack_from('<Q', self._mmap, len(MAGIC))
+        start = len(MAGIC) + 8
+        header = json.loads(str(self._mmap[start:start + length], 'utf-8'))
+        start += length
+        start += -start % ALIGN
+        self._buffer = memoryview(self._mmap)[start:]
+        self._key = header['key']
+        self._columns = [
+            (column['name'], MappedColumn(self._buffer,
+                                          column['kind'],
+                                          column['segments']))
+            for column in header['columns']
+        ]
+
+    @property
+    def key(self):
+        """Return key of the result."""
+        return self._key
+
+    @property
+    def columns(self):
+        """Return names of columns."""
+        return [name for name, _ in self._columns]
+
+    def __len__(self):
+        return len(self._columns[0][1]) if self._columns else 0
+
+    def __getitem__(self, name):
+        """Return column by name wrapping mapped values without copying."""
+        for cname, values in self._columns:
+            if cname == name:
+                return Column(values, name=name)
+
+        raise ValueError('unknown column name: %s' % name)
+
+    @property
+    def values(self):
+        """Return a tuples representation of the result."""
+        return list(zip(*(values for _, values in self._columns)))
+
+    def to_table(self):
+        """Return result as table; values are read to memory."""
+        return Table(*self.values, columns=self.columns)
+
+    def close(self):
+        """Unmap file; columns are not available after."""
+        for _, values in getattr(self, '_columns', ()):
+            values.release()
+
+        if getattr(self, '_buffer', None) is not None:
+            self._buffer.release()
+
+        self._mmap.close()
+        self._file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+
+class ResultCache:
+    """
+    Directory of query results keyed by query and version of data.
+
+    Results are valid while the data of database does not change,
+    see '_Schema.data_version'.
+    """
+
+    __slots__ = ('_directory', '_batch_size')
+
+    SUFFIX = '.npc'
+
+    def __init__(self, directory, batch_size=10000):
+        """
+        Use directory to store results.
+
+        Args:
+            directory (str): path to directory; it is created if missing.
+            batch_size (int): number of rows fetched and spilled at once.
+
+        """
+        os.makedirs(str(directory), exist_ok=True)
+        self._directory = str(directory)
+        self._batch_size = batch_size
+
+    def key(self, query):
+        """Return key of query result by compiled query and data version."""
+        version = query._schema.data_version()
+        if version is None:
+            raise ValueError('version of data is unknown, '
+                             'result can not be cached')
+
+        return hashlib.sha256(
+            json.dumps([query.query(), version]).encode('utf-8')
+        ).hexdigest()
+
+    def path(self, query):
+        """Return path to file of query result."""
+        return os.path.join(self._directory, self.key(query) + self.SUFFIX)
+
+    def fetch(self, query):
+        """
+        Return mapped result of query; it is executed on cache miss only.
+
+        Args:
+            query (QDataFrame): query to fetch.
+
+        Return:
+            MappedResult: result to read and close.
+
+        """
+        path = self.path(query)
+        if not os.path.exists(path):
+            rows = query._schema.iterrows(query.query(), self._batch_size)
+            write(path, query.columns, rows,
+                  batch_size=self._batch_size,
+                  key=os.path.basename(path)[:-len(self.SUFFIX)])
+
+        return MappedResult(path)
+
+    def clear(self):
+        """Remove all cached results."""
+        for name in os.listdir(self._directory):
+            if name.endswith(self.SUFFIX):
+                os.remove(os.path.join(self._directory, name))
@@ -9,15 +9,27 @@ Copyright 2020 Ilia Lazarev
 Licensed under the Apache License, Version 2.0
 """
 
+import os
+import re
+import sqlite3
+import uuid
+from collections import defaultdict
+from contextlib import contextmanager
+from functools import lru_cache
+from urllib.parse import quote
+
 from . import (
+    RdbmsMixin,
     _Schema,
     _OriginalTable,
     _JoinedTable,
+    _UnionTable,
+    _FullTextMatch,
     _Attribute,
     _QDataFrame,
     _QSeries
 )
-from .tools import Table
+from .tools import Column, Table
 
 
 __all__ = [
@@ -26,11 +38,13 @@ __all__ = [
 ]
 
 
-class SQLite:
+class SQLite(RdbmsMixin):
     """Parameters of 'sqlite' nopandas module."""
 
     ID = 'sqlite'
     MODULE = 'sqlite3'
+    PLACEHOLDER = '?'
+    ROWID = 'rowid'
 
     __slots__ = ()
 
@@ -43,15 +57,306 @@ class Schema(_Schema, SQLite):
 
     """
 
-    __slots__ = ()
+    __slots__ = ('_token',)
+
+    def __init__(self, conn, **kwargs):
+        """
+        Get schema of SQLite DB by connection.
+
+        Args:
+            conn (Connection): connection of 'sqlite3' module.
+            **kwargs: see '_Schema'.
+
+        """
+        super().__init__(conn, **kwargs)
+        # Ids of connections are reused, so versions of databases
+        # in memory are identified by token which never repeats.
+        self._token = uuid.uuid4().hex
+
+    # Rollback journal is kept in memory, so failed loading is rolled back.
+    LOAD_PRAGMAS = {
+        'journal_mode': 'MEMORY',
+        'synchronous': 'OFF',
+    }
+
+    PROFILES = {
+        # SQLite defaults, nothing is changed.
+        'default': {},
+        # Read-heavy workload: memory-mapped I/O and large page cache
+        # (256 MiB each), temporary tables and indices in memory and
+        # WAL journal to not block readers by writers.
+        'analytics': {
+            'mmap_size': 268435456,
+            'cache_size': -262144,
+            'temp_store': 'MEMORY',
+            'journal_mode': 'WAL',
+        },
+        # Write-heavy workload: rollback journal in memory and no syncing
+        # to disk, so database may be corrupted by crash during loading.
+        'bulk_load': dict(LOAD_PRAGMAS,
+                          cache_size=-262144,
+                          temp_store='MEMORY'),
+    }
+
+    PRAGMAS = [
+        'journal_mode',
+        'synchronous',
+        'cache_size',
+        'mmap_size',
+        'temp_store',
+        'page_size',
+        'locking_mode',
+        'query_only',
+        'foreign_keys',
+    ]
+
+    @classmethod
+    def open(cls, path, profile='default', readonly=False, **pragmas):
+        """
+        Open SQLite database file and tune the connection by profile.
+
+        Args:
+            path (str): path to database file.
+            profile ({'default', 'analytics', 'bulk_load'}): name of pragma
+                bundle, see 'Schema.PROFILES'; default 'default'.
+            readonly (bool): open database in read-only mode if True;
+                persistent 'journal_mode' is not changed then.
+            **pragmas: pragmas to override values of profile.
+
+        Return:
+            Schema: schema of opened database.
+
+        """
+        if profile not in cls.PROFILES:
+            raise ValueError('unknown profile: %r' % profile)
+
+        pragmas = dict(cls.PROFILES[profile], **pragmas)
+        if readonly:
+            conn = sqlite3.connect('file:%s?mode=ro' % quote(str(path)),
+                                   uri=True)
+            pragmas.pop('journal_mode', None)
+        else:
+            conn = sqlite3.connect(str(path))
+
+        schema = cls(conn)
+        schema._set_pragmas(pragmas)
+        return schema
+
+    def _set_pragmas(self, pragmas):
+        """Set pragmas and return their previous values."""
+        previous = {}
+        for name, value in pragmas.items():
+            previous[name] = self.fetchall('PRAGMA %s;' % name)[0][0]
+            self.fetchall('PRAGMA %s = %s;' % (name, value))
+
+        return previous
+
+    def pragmas(self):
+        """Return effective values of performance related pragmas."""
+        return Table(*((name, self.fetchall('PRAGMA %s;' % name)[0][0])
+                       for name in self.PRAGMAS),
+                     columns=['name', 'value'])
+
+    @contextmanager
+    def _bulk_load(self):
+        """
+        Keep journal in memory and disable syncing for the loading.
+
+        Failed loading is still rolled back, but a crash during it
+        may corrupt database, so previous settings are restored
+        right after it.
+        """
+        previous = self._set_pragmas(self.LOAD_PRAGMAS)
+        try:
+            yield
+
+        finally:
+            self._set_pragmas(previous)
+
+    def attach(self, path, alias):
+        """
+        Attach database file to the connection.
+
+        Tables of attached database are available as 'alias.table'
+        and can be joined with others in one statement.
+
+        Args:
+            path (str): path to database file.
+            alias (str): name of attached database.
+
+        """
+        with self.cursor() as cursor:
+            cursor.execute('ATTACH DATABASE ? AS %s;' % alias, (str(path),))
+
+    def detach(self, alias):
+        """Detach database attached as 'alias'."""
+        self.fetchall('DETACH DATABASE %s;' % alias)
+
+    def create_fulltext_index(self, table, columns, name=None):
+        """
+        Create FTS5 external content index of text columns of table.
+
+        Index stores only tokens, text is read from table by rowid.
+        Triggers keep index in sync with inserts, updates and deletes.
+
+        Args:
+            table (str): name of indexed table.
+            columns (list of str): names of text columns.
+            name (str): name of index; default '<table>_fts'.
+
+        Return:
+            str: name of index.
+
+        """
+        name = name or '%s_fts' % table
+        names = ', '.join(columns)
+        new = ', '.join('new.%s' % column for column in columns)
+        old = ', '.join('old.%s' % column for column in columns)
+        params = {'name': name, 'table': table, 'names': names,
+                  'new': new, 'old': old, 'rowid': self.ROWID}
+        delete = ("INSERT INTO %(name)s(%(name)s, rowid, %(names)s)"
+                  " VALUES('delete', old.%(rowid)s, %(old)s);" % params)
+        insert = ("INSERT INTO %(name)s(rowid, %(names)s)"
+                  " VALUES(new.%(rowid)s, %(new)s);" % params)
+        with self.transaction() as cursor:
+            cursor.execute(
+                "CREATE VIRTUAL TABLE %(name)s USING fts5(%(names)s,"
+                " content='%(table)s', content_rowid='%(rowid)s');" % params
+            )
+            cursor.execute("INSERT INTO %(name)s(%(name)s)"
+                           " VALUES('rebuild');" % params)
+            for event, body in (('INSERT', insert),
+                                ('DELETE', delete),
+                                ('UPDATE', delete + ' ' + insert)):
+                cursor.execute(
+                    "CREATE TRIGGER %s_%s AFTER %s ON %s BEGIN %s END;"
+                    % (name, event.lower(), event, table, body)
+                )
+
+        return name
+
+    def fulltext_index(self, table):
+        """Return name of FTS5 index of table."""
+        master = self._master
+        for name, sql in zip(master['name'], master['sql']):
+            if sql and 'USING fts5(' in sql \
+                    and "content='%s'" % table in sql:
+                return name
+
+        raise ValueError('table %r has no full-text index' % table)
+
+    @property
+    def databases(self):
+        """Return names of attached databases."""
+        rows = self.fetchall('PRAGMA database_list;', cache=True)
+        return [name for _, name, _ in rows
+                if name not in ('main', 'temp')]
+
+    def _create_function(self, name, func, deterministic):
+        """Register scalar function on the connection."""
+        self._conn.create_function(name, -1, func,
+                                   deterministic=deterministic)
+
+    def _create_aggregate(self, name, cls):
+        """Register aggregate class on the connection."""
+        self._conn.create_aggregate(name, -1, cls)
+
+    def _begin_snapshot(self):
+        """Read schema to start read transaction, WAL snapshot is fixed."""
+        self.fetchall('SELECT COUNT(*) FROM sqlite_master;')
+
+    def data_version(self):
+        """
+        Return modification times and sizes of database files.
+
+        Files are changed by commits of any connection or process,
+        so the version is comparable across them. Databases in memory
+        are versioned by token of the schema and changes of connection.
+        """
+        version = []
+        for _, name, path in self.fetchall('PRAGMA database_list;'):
+            if not path:
+                version.append([name, self._token,
+                                self._conn.total_changes])
+                continue
+
+            for file in (path, path + '-wal'):
+                if os.path.exists(file):
+                    stat = os.stat(file)
+                    version.append([file, stat.st_mtime_ns, stat.st_size])
+
+        return version
+
+    # Shadow tables of FTS5 index store its tokens and settings.
+    FULLTEXT_SHADOWS = ('_data', '_idx', '_content', '_docsize', '_config')
+
+    @classmethod
+    def _user_tables(cls, rows):
+        """Return names of tables without full-text indices and shadows."""
+        hidden = set()
+        for name, sql in rows:
+            if sql and 'USING fts5(' in sql:
+                hidden.add(name)
+                hidden.update(name + suffix
+                              for suffix in cls.FULLTEXT_SHADOWS)
+
+        return [name for name, _ in rows if name not in hidden]
 
     @property
     def tables(self):
-        """Return list of table names."""
-        return self._master[
+        """
+        Return list of table names, attached ones are 'alias.table'.
+
+        Full-text indices and their shadow tables are not listed.
+        """
+        master = self._master[
             (self._master['type'] == 'table')
             & ~(self._master['name'].isin(self.system_tables))
-        ]['name']
+        ]
+        tables = self._user_tables(list(zip(master['name'], master['sql'])))
+        for database in self.databases:
+            query = ("SELECT name, sql FROM %s.sqlite_master"
+                     " WHERE type = 'table' AND name NOT LIKE 'sqlite_%%';"
+                     % database)
+            tables.extend('%s.%s' % (database, name)
+                          for name in self._user_tables(
+                              self.fetchall(query, cache=True)))
+
+        return Column(tables, name='name')
+
+    def _pragma(self, pragma, name):
+        """Return rows of pragma of (may be attached) table or index."""
+        database, _, name = name.rpartition('.')
+        return self.fetchall('PRAGMA %s%s(%s);' % (
+            database + '.' if database else '', pragma, name
+        ), cache=True)
+
+    def declared_types(self, table_name):
+        """Return declared types of table columns by their names."""
+        return {name: dtype or None
+                for _, name, dtype, *_ in self._pragma('table_info',
+                                                       table_name)}
+
+    def unique_columns(self, table_name):
+        """Return names of primary key and single column unique indices."""
+        unique = {self.ROWID}
+        primary = [name for _, name, _, _, _, pk
+                   in self._pragma('table_info', table_name)
+                   if pk]
+        if len(primary) == 1:
+            unique.add(primary[0])
+
+        database, _, _ = table_name.rpartition('.')
+        indices = self._pragma('index_list', table_name)
+        for _, index, is_unique, *_ in indices:
+            if database:
+                index = '%s.%s' % (database, index)
+
+            columns = self._pragma('index_info', index)
+            if is_unique and len(columns) == 1:
+                unique.add(columns[0][2])
+
+        return unique
 
     @property
     def system_tables(self):
@@ -81,7 +386,7 @@ class Schema(_Schema, SQLite):
         """
         columns = ["type", "name", "tbl_name", "rootpage", "sql"]
         query = "SELECT %s FROM sqlite_master;" % ', '.join(columns)
-        return Table(*self.fetchall(query), columns=columns)
+        return Table(*self.fetchall(query, cache=True), columns=columns)
 
     @property
     def _sequence(self):
@@ -105,8 +410,130 @@ class Schema(_Schema, SQLite):
         This table is created by the ANALYZE command to store statistical
         information about the tables and indexes analyzed. This information
         will be later used by the query optimizer.
+
+        Columns:
+        tbl - Name of analyzed table.
+        idx - Name of analyzed index or None for table without index.
+        stat - List of integers: first one is approximate number of rows
+            in the table, next ones are average numbers of rows selected
+            by each prefix of index columns.
+
         """
-        raise NotImplementedError
+        columns = ["tbl", "idx", "stat"]
+        if 'sqlite_stat1' not in self._master['name']:
+            return Table(columns=columns)
+
+        query = "SELECT %s FROM sqlite_stat1;" % ', '.join(columns)
+        return Table(*self.fetchall(query, cache=True), columns=columns)
+
+    def row_estimate(self, table_name):
+        """Return number of table rows estimated by 'ANALYZE' or None."""
+        stat1 = self._stat1
+        stats = stat1[stat1['tbl'] == table_name]['stat']
+        if len(stats) == 0:
+            return None
+
+        return int(stats[0].split()[0])
+
+    # Rows selected by equality on index column without statistics
+    # and share of rows left by each range bound, as SQLite assumes.
+    EQUALITY_ROWS = 10
+    RANGE_SELECTIVITY = 4
+
+    def _table_rows(self, table_name):
+        """Return number of table rows by statistics or largest rowid."""
+        rows = self.row_estimate(table_name)
+        if rows is None:
+            try:
+                rows, = self.fetchall('SELECT MAX(rowid) FROM %s;'
+                                      % table_name, cache=True)[0]
+            except sqlite3.DatabaseError:
+                rows = None
+
+        return rows or 0
+
+    def _index_rows(self, table_name, index, equalities):
+        """Return rows selected by equalities on prefix of index columns."""
+        stat1 = self._stat1
+        for tbl, idx, stat in stat1.values:
+            if tbl == table_name and idx == index:
+                stat = stat.split()
+                if equalities < len(stat):
+                    return int(stat[equalities])
+
+        return self.EQUALITY_ROWS
+
+    def _loop_rows(self, detail, subqueries, aliases):
+        """Return rows of 'SCAN' or 'SEARCH' step of query plan."""
+        words = detail.split()
+        name = words[1]
+        if name == 'CONSTANT':
+            return 1
+
+        if name in subqueries:
+            rows = subqueries[name]
+        elif name == 'SUBQUERY' and words[2] in subqueries:
+            rows = subqueries[words[2]]
+        else:
+            name = aliases.get(name, name)
+            if name not in self.tables:
+                return 1
+
+            rows = self._table_rows(name)
+
+        if words[0] == 'SCAN':
+            return rows
+
+        terms = detail[detail.rfind('(') + 1:detail.rfind(')')].split(' AND ')
+        equalities = sum(term.endswith('=?') for term in terms)
+        if 'PRIMARY KEY' in detail and equalities:
+            return 1
+
+        if equalities:
+            match = re.search(r' INDEX (\w+) \(', detail)
+            if match is None or 'AUTOMATIC' in detail:
+                rows = self.EQUALITY_ROWS
+            else:
+                rows = self._index_rows(name, match.group(1), equalities)
+
+        for _ in range(len(terms) - equalities):
+            rows /= self.RANGE_SELECTIVITY
+
+        return max(int(rows), 1)
+
+    def estimate_rows(self, query):
+        """
+        Return number of rows of query estimated by 'EXPLAIN QUERY PLAN'.
+
+        Rows of nested loops are multiplied, rows of compound query
+        are summed. Scanned tables are estimated by 'ANALYZE' statistics
+        or largest rowid, searches by statistics of used index.
+        """
+        children = defaultdict(list)
+        for node, parent, _, detail in self.fetchall(
+                'EXPLAIN QUERY PLAN %s;' % query):
+            children[parent].append((node, detail))
+
+        tables = self.tables
+        aliases = {alias: table for table, alias
+                   in re.findall(r'\b(\w+) AS (\w+)\b', query)
+                   if table in tables}
+        subqueries = {}
+
+        def estimate(parent):
+            rows = 1
+            for node, detail in children[parent]:
+                step, _, name = detail.partition(' ')
+                if step in ('MATERIALIZE', 'CO-ROUTINE'):
+                    subqueries[name] = estimate(node)
+                elif detail == 'COMPOUND QUERY':
+                    rows *= sum(estimate(part) for part, _ in children[node])
+                elif step in ('SCAN', 'SEARCH'):
+                    rows *= self._loop_rows(detail, subqueries, aliases)
+
+            return rows
+
+        return estimate(0)
 
 
 class OriginalTable(_OriginalTable, SQLite):
@@ -120,11 +547,95 @@ class JoinedTable(_JoinedTable, SQLite):
     __slots__ = ()
 
 
+class FullTextMatch(_FullTextMatch, SQLite):
+
+    __slots__ = ()
+
+    def __str__(self):
+        """Return display subquery of matches ordered by 'bm25' rank."""
+        return ("(SELECT rowid AS docid, bm25(%(index)s) AS score"
+                " FROM %(index)s WHERE %(index)s MATCH %(query)s"
+                " ORDER BY score%(limit)s)" % {
+                    'index': self._index,
+                    'query': Attribute.literal(self._query),
+                    'limit': '' if self._limit is None
+                    else ' LIMIT %d' % self._limit,
+                })
+
+
+class UnionTable(_UnionTable, SQLite):
+
+    __slots__ = ()
+
+
 class Attribute(_Attribute, SQLite):
     """Attribute of database 'Source'."""
 
     __slots__ = ()
 
+    STORAGE_CLASSES = ('integer', 'real', 'text', 'blob', 'null')
+
+    @staticmethod
+    def typeof(arg):
+        """Return display expression of storage class of value."""
+        return "typeof(%s)" % str(arg)
+
+    @staticmethod
+    @lru_cache(maxsize=None)
+    def fulltext(index):
+        """Return display expression function of FTS5 match."""
+
+        def fulltext(rowid, query):
+            return "(%s IN (SELECT rowid FROM %s WHERE %s MATCH %s))" % (
+                rowid, index, index, query
+            )
+
+        fulltext.__name__ = 'fulltext_%s' % index
+        return fulltext
+
+    @staticmethod
+    def glob(arg, pattern):
+        """Return display expression of case-sensitive pattern matching."""
+        return "(%s GLOB %s)" % (arg, pattern)
+
+    @staticmethod
+    def greatest(*args):
+        """Return display expression of maximum of values or NULL."""
+        return "MAX(%s)" % ', '.join(args)
+
+    @staticmethod
+    def least(*args):
+        """Return display expression of minimum of values or NULL."""
+        return "MIN(%s)" % ', '.join(args)
+
+    @staticmethod
+    def epoch(arg, unit):
+        """
+        Return display expression of integer seconds since epoch.
+
+        Text is parsed as timestamp by 'strftime', numbers are epoch.
+        """
+        return ("CAST(CASE WHEN typeof(%(arg)s) IN ('integer', 'real')"
+                " THEN %(arg)s%(scale)s ELSE strftime('%%s', %(arg)s) END"
+                " AS INTEGER)" % {'arg': arg,
+                                  'scale': ' / 1000' if unit == 'ms' else ''})
+
+    @staticmethod
+    def from_epoch(arg):
+        """Return display expression of timestamp text of epoch seconds."""
+        return "datetime(%s, 'unixepoch')" % arg
+
+    @staticmethod
+    def nbytes(arg):
+        """
+        Return display expression of total size of values in bytes.
+
+        Numbers are counted as 8 bytes, text as UTF-8 encoded bytes.
+        """
+        return ("SUM(CASE typeof(%(arg)s) WHEN 'integer' THEN 8"
+                " WHEN 'real' THEN 8"
+                " ELSE LENGTH(CAST(%(arg)s AS BLOB)) END)" % {'arg': arg})
+
 
 class QDataFrame(_QDataFrame, SQLite):
     """SQLite query for DataFrame."""
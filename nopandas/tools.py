@@ -10,7 +10,135 @@ Copyright 2020 Ilia Lazarev
 Licensed under the Apache License, Version 2.0
 """
 
+import bz2
 import copy
+import gzip
+import lzma
+from collections import OrderedDict, namedtuple
+from contextlib import contextmanager
+from itertools import islice
+
+
+COMPRESSIONS = {
+    'gzip': (gzip.open, '.gz'),
+    'bz2': (bz2.open, '.bz2'),
+    'xz': (lzma.open, '.xz'),
+}
+
+
+Estimate = namedtuple('Estimate', ['value', 'error'])
+Estimate.__doc__ = """
+Approximate value.
+
+Fields:
+    value: estimated value.
+    error: half-width of 95% confidence interval; None if unknown.
+"""
+
+
+ResultSize = namedtuple('ResultSize', ['rows', 'bytes'])
+ResultSize.__doc__ = """
+Estimated size of query result.
+
+Fields:
+    rows: estimated number of rows; None if unknown.
+    bytes: estimated memory of fetched rows in bytes; None if unknown.
+"""
+
+
+def chunked(iterable, size):
+    """Yield lists of 'size' items of iterable; last list may be shorter."""
+    iterator = iter(iterable)
+    chunk = list(islice(iterator, size))
+    while chunk:
+        yield chunk
+        chunk = list(islice(iterator, size))
+
+
+def infer_type(values):
+    """
+    Return narrowest type of 'int', 'float' and 'str' for string values.
+
+    None values are skipped, 'str' is returned if there are no others.
+    """
+    kinds = (int, float, str)
+    index = None
+    for value in values:
+        if value is None:
+            continue
+
+        index = index or 0
+        while kinds[index] is not str:
+            try:
+                kinds[index](value)
+                break
+            except ValueError:
+                index += 1
+
+        if kinds[index] is str:
+            return str
+
+    return str if index is None else kinds[index]
+
+
+@contextmanager
+def open_text(path_or_file, mode='r', compression='infer'):
+    """
+    Open text file which may be compressed.
+
+    Args:
+        path_or_file (str or file-like object): path to file or opened file;
+            opened files are used as is and not closed.
+        mode ({'r', 'w', 'a'}): text mode of file.
+        compression ({'infer', 'gzip', 'bz2', 'xz', None}): compression
+            of file; 'infer' detects it by path extension.
+
+    """
+    if hasattr(path_or_file, 'read') or hasattr(path_or_file, 'write'):
+        yield path_or_file
+        return
+
+    path = str(path_or_file)
+    if compression == 'infer':
+        compression = next((name
+                            for name, (_, ext) in COMPRESSIONS.items()
+                            if path.endswith(ext)),
+                           None)
+
+    if compression is None:
+        opener = open
+    elif compression in COMPRESSIONS:
+        opener = COMPRESSIONS[compression][0]
+    else:
+        raise ValueError('unknown compression: %r' % compression)
+
+    with opener(path, mode.strip('t') + 't',
+                encoding='utf-8', newline='') as file:
+        yield file
+
+
+def _keys(key):
+    """Return list of column names by name or list of names."""
+    return [key] if isinstance(key, str) else list(key)
+
+
+def _notnull(values):
+    """Return list of values without None."""
+    return [value for value in values if value is not None]
+
+
+AGGREGATES = {
+    'count': lambda values: len(_notnull(values)),
+    'size': len,
+    'sum': lambda values: sum(_notnull(values)),
+    'mean': lambda values: (sum(_notnull(values)) / len(_notnull(values))
+                            if _notnull(values) else None),
+    'min': lambda values: min(_notnull(values), default=None),
+    'max': lambda values: max(_notnull(values), default=None),
+    'first': lambda values: values[0],
+    'last': lambda values: values[-1],
+    'nunique': lambda values: len(set(_notnull(values))),
+}
 
 
 class Table:
@@ -69,6 +197,9 @@ class Table:
     @property
     def valuest(self):
         """Return transposed values."""
+        if not self._values:
+            return [[] for _ in self._columns]
+
         return [list(x) for x in zip(*self._values)]
 
     @property
@@ -102,7 +233,7 @@ class Table:
 
     def __getitem__(self, key):
         if isinstance(key, (list, tuple, Column)):
-            if all(isinstance(k, str) for k in key):
+            if len(key) > 0 and all(isinstance(k, str) for k in key):
                 _columns = [
                     (cname, copy.copy(cvalues))
                     for cname, cvalues in zip(self.columns, self.valuest)
@@ -131,6 +262,178 @@ class Table:
 
         raise TypeError('unknown key type: %s' % key.__class__.__name__)
 
+    def _indices(self, columns):
+        """Return indices of columns by their names."""
+        unknown = [name for name in columns if name not in self._columns]
+        if unknown:
+            raise ValueError('unknown columns: %s' % unknown)
+
+        return [self._columns.index(name) for name in columns]
+
+    def merge(self, right, on, how='inner', suffixes=('_x', '_y')):
+        """
+        Join table with other one by equal values of key columns.
+
+        The right table is indexed by hash of keys, so the join takes
+        linear time. Rows with None in keys are not matched, like NULL.
+
+        Args:
+            right (Table): table to join.
+            on (str or list of str): names of columns to join on.
+            how ({'inner', 'left', 'right', 'outer'}): default 'inner'.
+            suffixes (tuple of str): suffixes of overlapping names of
+                left and right columns; default ('_x', '_y').
+
+        Return:
+            Table: joined table, rows are ordered as left ones.
+
+        """
+        if how not in ('inner', 'left', 'right', 'outer'):
+            raise ValueError('unknown join type: %r' % how)
+
+        on = _keys(on)
+        lkeys, rkeys = self._indices(on), right._indices(on)
+        rrest = [i for i, name in enumerate(right.columns) if name not in on]
+
+        index = {}
+        for i, row in enumerate(right.values):
+            key = tuple(row[k] for k in rkeys)
+            if None not in key:
+                index.setdefault(key, []).append(i)
+
+        rows, matched = [], set()
+        rnulls = [None] * len(rrest)
+        for row in self._values:
+            key = tuple(row[k] for k in lkeys)
+            found = index.get(key, ()) if None not in key else ()
+            for i in found:
+                rows.append(list(row) + [right.values[i][k] for k in rrest])
+
+            matched.update(found)
+            if not found and how in ('left', 'outer'):
+                rows.append(list(row) + rnulls)
+
+        if how in ('right', 'outer'):
+            for i, rrow in enumerate(right.values):
+                if i in matched:
+                    continue
+
+                row = [None] * len(self._columns)
+                for lkey, rkey in zip(lkeys, rkeys):
+                    row[lkey] = rrow[rkey]
+
+                rows.append(row + [rrow[k] for k in rrest])
+
+        rnames = [right.columns[i] for i in rrest]
+        overlap = set(self._columns) & set(rnames)
+        columns = [name + suffixes[0] if name in overlap else name
+                   for name in self._columns] \
+            + [name + suffixes[1] if name in overlap else name
+               for name in rnames]
+        return Table(*rows, columns=columns)
+
+    def sort_values(self, by, ascending=True):
+        """
+        Return table sorted by values of columns; None values are last.
+
+        Args:
+            by (str or list of str): names of columns to sort by.
+            ascending (bool or list of bool): sort ascending vs. descending,
+                list is for each column; default True.
+
+        """
+        by = _keys(by)
+        if isinstance(ascending, bool):
+            ascending = [ascending] * len(by)
+
+        if len(ascending) != len(by):
+            raise ValueError('ascending should have same length as by')
+
+        rows = list(self._values)
+        for index, asc in reversed(list(zip(self._indices(by), ascending))):
+            nulls = [row for row in rows if row[index] is None]
+            rows = sorted((row for row in rows if row[index] is not None),
+                          key=lambda row: row[index],
+                          reverse=not asc) + nulls
+
+        return Table(*rows, columns=list(self._columns), **self.config)
+
+    def groupby(self, by):
+        """
+        Group rows by values of columns.
+
+        Args:
+            by (str or list of str): names of columns to group by.
+
+        Return:
+            GroupBy: groups to aggregate.
+
+        """
+        return GroupBy(self, _keys(by))
+
+
+class GroupBy:
+    """Rows of 'Table' grouped by values of columns."""
+
+    __slots__ = ('_table', '_by', '_groups')
+
+    def __init__(self, table, by):
+        """
+        Collect indices of rows by group in one pass over the table.
+
+        Args:
+            table (Table): table to group.
+            by (list of str): names of columns to group by.
+
+        """
+        keys = table._indices(by)
+        groups = OrderedDict()
+        for i, row in enumerate(table.values):
+            groups.setdefault(tuple(row[k] for k in keys), []).append(i)
+
+        self._table = table
+        self._by = by
+        self._groups = groups
+
+    def __len__(self):
+        return len(self._groups)
+
+    def agg(self, func):
+        """
+        Aggregate columns of each group.
+
+        Args:
+            func (dict): aggregation of column by its name, aggregation
+                is name of 'AGGREGATES' or function of list of values;
+                pair of column name and aggregation may be given as value
+                to name a result column by key.
+
+        Return:
+            Table: group keys and aggregated columns, rows are sorted
+                by keys.
+
+        """
+        specs = []
+        for name, spec in func.items():
+            column, spec = spec if isinstance(spec, tuple) else (name, spec)
+            if isinstance(spec, str):
+                if spec not in AGGREGATES:
+                    raise ValueError('unknown aggregation: %r' % spec)
+
+                spec = AGGREGATES[spec]
+
+            specs.append((name, self._table._indices([column])[0], spec))
+
+        rows = self._table.values
+        result = [
+            list(key) + [agg([rows[i][index] for i in indices])
+                         for _, index, agg in specs]
+            for key, indices in self._groups.items()
+        ]
+        table = Table(*result,
+                      columns=self._by + [name for name, _, _ in specs])
+        return table.sort_values(self._by)
+
 
 class Column:
     """Cheap alternative for 'pandas.Series'."""
@@ -4,7 +4,9 @@ import unittest
 import unittest.mock as mock
 
 from nopandas import (
+    _inheritor,
     _QDataFrame,
+    _QSeries,
     _Attribute,
 )
 
@@ -61,3 +63,90 @@ class TestQSeriesExpressionCompilation(unittest.TestCase):
             str(_Attribute((_Attribute.eq, self.attr, 'CAT'))),
             "(table.attr = 'CAT')"
         )
+
+
+class TestAttributeSimplification(unittest.TestCase):
+    """Test simplification of attribute expression tree."""
+
+    def setUp(self):
+        """Create pure attributes."""
+        self.attr = _Attribute('attr', source='table')
+        self.other = _Attribute('other', source='table')
+
+    def test_constant_folding(self):
+        """Fold arithmetic over constants."""
+        expr = _Attribute((_Attribute.add, 2, 3))
+        expr = _Attribute((_Attribute.gt, self.attr, expr))
+        self.assertEqual(str(expr.simplify()), '(table.attr > 5)')
+
+    def test_comparison_folding(self):
+        """Fold comparison of constants to integer."""
+        expr = _Attribute((_Attribute.ge, 'b', 'a'))
+        self.assertEqual(str(expr.simplify()), '1')
+        expr = _Attribute((_Attribute.ge, 2, 3))
+        self.assertEqual(str(expr.simplify()), '0')
+
+    def test_string_constants_are_not_added(self):
+        """Keep addition of strings since SQL casts them to numbers."""
+        expr = _Attribute((_Attribute.add, 'a', 'b'))
+        self.assertEqual(str(expr.simplify()), "('a' + 'b')")
+
+    def test_identity_elimination(self):
+        """Eliminate adding and subtracting of zero to number."""
+        expr = _Attribute((_Attribute.mul, self.attr, 2))
+        expr = _Attribute((_Attribute.add, 0, expr))
+        expr = _Attribute((_Attribute.sub, expr, 0))
+        self.assertEqual(str(expr.simplify()), '(table.attr * 2)')
+
+    def test_zero_addition_to_column(self):
+        """Keep adding of zero to column since it casts text to number."""
+        expr = _Attribute((_Attribute.add, self.attr, 0))
+        self.assertEqual(str(expr.simplify()), '(table.attr + 0)')
+        expr = _Attribute((_Attribute.sub, self.attr, 0))
+        self.assertEqual(str(expr.simplify()), '(table.attr - 0)')
+
+    def test_self_equality_predicate(self):
+        """Replace self equality in condition by NULL test."""
+        expr = _Attribute((_Attribute.eq, self.attr,
+                           _Attribute('attr', source='table')))
+        self.assertEqual(str(expr.simplify()), '(table.attr = table.attr)')
+        self.assertEqual(str(expr.simplify(predicate=True)),
+                         '(table.attr IS NOT NULL)')
+
+    def test_functions(self):
+        """Collect names of functions of expression tree."""
+        expr = _Attribute((_Attribute.add, self.attr,
+                           _Attribute((_Attribute.sum, self.other))))
+        self.assertEqual(expr.functions(), {'add', 'sum'})
+        self.assertEqual(self.attr.functions(), set())
+
+    def test_common_subexpression_sharing(self):
+        """Share structurally equal subtrees of simplified expression."""
+        left = _Attribute((_Attribute.add, self.attr, self.other))
+        right = _Attribute((_Attribute.add, self.attr, self.other))
+        self.assertEqual(left, right)
+        expr = _Attribute((_Attribute.sub, left, right)).simplify()
+        self.assertIs(expr._expr[1], expr._expr[2])
+
+
+class TestInheritorDispatch(unittest.TestCase):
+    """Test dispatching of backend classes."""
+
+    def test_dispatch_by_id_and_module(self):
+        """Find backend class by ID and connection module name."""
+        from nopandas import sqlite
+
+        self.assertIs(_inheritor(_QSeries, 'sqlite'), sqlite.QSeries)
+        self.assertIs(_inheritor(_Attribute, 'sqlite3'), sqlite.Attribute)
+
+    def test_dispatch_unknown_label(self):
+        """Fail on unknown backend label."""
+        with self.assertRaisesRegex(ValueError, 'no inheritor'):
+            _inheritor(_QSeries, 'unknown')
+
+    def test_original_attributes_interning(self):
+        """Share original attribute objects by name and source."""
+        self.assertIs(_Attribute.original('attr', 'table'),
+                      _Attribute.original('attr', 'table'))
+        self.assertIsNot(_Attribute.original('attr', 'table'),
+                         _Attribute.original('attr', 'alias'))
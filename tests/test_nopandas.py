@@ -100,6 +100,12 @@ class TestBacisFunctionality:
              "FROM tracks;")
         )
 
+    def test_text_plus_zero(self):
+        """Cast text to number by adding zero."""
+        names = self.schema['tracks']['Name'] + 0
+        self.assertIn('(tracks.Name + 0)', names.query())
+        self.assertEqual(names.values[:2], (0, 0))
+
     def test_query_base(self):
         """Basic selection from table."""
         self.assertEqual(
@@ -136,6 +142,351 @@ class TestBacisFunctionality:
         self.assertListEqual(mtracks.columns,
                              ['track', 'span', 'album', 'artist'])
 
+    def test_count_non_null(self):
+        """Count non-null values of each column."""
+        tracks = self.schema['tracks'][['TrackId', 'Composer']]
+        self.assertEqual(list(tracks.count()), [3503, 2525])
+
+    def test_declared_dtypes(self):
+        """Get declared types of original and computed columns."""
+        tracks = self.schema['tracks']
+        self.assertEqual(list(tracks[['TrackId', 'Name']].dtypes),
+                         ['INTEGER', 'NVARCHAR(200)'])
+        computed = tracks.copy_with(attrs=(tracks['Bytes'] + 1)._attrs)
+        self.assertEqual(list(computed.dtypes), [None])
+
+    def test_memory_usage(self):
+        """Estimate size of columns values in bytes."""
+        albums = self.schema['albums'].iloc[:2]
+        title_size = len('For Those About To Rock We Salute You'
+                         'Balls to the Wall')
+        self.assertEqual(list(albums.memory_usage()),
+                         [16, title_size, 16])
+
+    def test_info(self):
+        """Print summary of frame."""
+        import io
+        from contextlib import redirect_stdout
+
+        output = io.StringIO()
+        with redirect_stdout(output):
+            self.schema['tracks'][['Name', 'Composer']].info()
+
+        lines = output.getvalue().splitlines()
+        self.assertEqual(lines[0], '3503 entries, 2 columns')
+        self.assertIn('2525 non-null', lines[4])
+        self.assertEqual(lines[6],
+                         'dtypes: NVARCHAR(200)(1), NVARCHAR(220)(1)')
+
+    def test_value_counts(self):
+        """Count most frequent values of column."""
+        genres = self.schema['tracks']['GenreId']
+        counts = genres.value_counts(top=2)
+        self.assertEqual(counts.columns, ['GenreId', 'count'])
+        self.assertEqual(counts.values, [[1, 1297], [7, 579]])
+        proportions = genres.value_counts(normalize=True, top=1)
+        self.assertAlmostEqual(proportions.values[0][1], 1297 / 3503)
+
+    def test_value_counts_with_null(self):
+        """Count values including NULL."""
+        composers = self.schema['tracks']['Composer']
+        self.assertEqual(composers.value_counts(dropna=False, top=1).values,
+                         [[None, 978]])
+        self.assertNotIn(None, composers.value_counts()['Composer'])
+
+    def test_unique_values(self):
+        """Get unique values and their number."""
+        media_types = self.schema['tracks']['MediaTypeId']
+        self.assertEqual(sorted(media_types.unique()), [1, 2, 3, 4, 5])
+        self.assertEqual(media_types.nunique(), 5)
+        composers = self.schema['tracks']['Composer']
+        self.assertEqual(composers.nunique(dropna=False),
+                         composers.nunique() + 1)
+
+    def test_sample_rows(self):
+        """Sample rows by number and fraction."""
+        tracks = self.schema['tracks']
+        sample = tracks.sample(n=10, seed=1)
+        self.assertEqual(sample.shape, (10, 9))
+        self.assertEqual(sample.values, tracks.sample(n=10, seed=1).values)
+        self.assertNotEqual(sample.values, tracks.sample(n=10, seed=2).values)
+        height, _ = tracks.sample(frac=0.1, seed=1).shape
+        self.assertLess(abs(height - 350), 60)
+
+    def test_sample_seeds(self):
+        """Sample unrelated rows by different seeds."""
+        tracks = self.schema['tracks']
+        first = set(tracks.sample(frac=0.1, seed=1)['TrackId'].values)
+        second = set(tracks.sample(frac=0.1, seed=2)['TrackId'].values)
+        shifted = {track_id + 1 for track_id in first}
+        # About 35 common rows are expected for independent samples.
+        self.assertLess(len(first & second), 70)
+        self.assertLess(len(shifted & second), 70)
+        self.assertLess(abs(len(second) - 350), 60)
+        height, _ = tracks.sample(frac=0.5, seed=3).shape
+        self.assertLess(abs(height - 1751), 150)
+
+    def test_sample_joined_frame(self):
+        """Fail to sample frame without single source table."""
+        albums = self.schema['albums'].merge(self.schema['artists'])
+        with self.assertRaisesRegex(ValueError, 'single table'):
+            albums.sample(n=1)
+
+    def test_approximate_shape(self):
+        """Estimate number of rows by statistics and sample."""
+        tracks = self.schema['tracks']
+        (rows, _), width = tracks.approx_shape()
+        self.assertEqual((rows, width), (3503, 9))
+        rock = tracks[tracks['GenreId'] == 1]
+        rows, error = rock.approx_shape(sample_size=1000, seed=1)[0]
+        self.assertLess(abs(rows - 1297), 3 * error)
+
+    def test_approximate_aggregates(self):
+        """Estimate aggregates by sample with error."""
+        span = self.schema['tracks']['Milliseconds']
+        mean = span.mean(approx=True, sample_size=1000, seed=1)
+        self.assertLess(abs(mean.value - 393599), 3 * mean.error)
+        total = span.sum(approx=True, sample_size=1000, seed=1)
+        self.assertLess(abs(total.value - 1378778040), 3 * total.error)
+        exact = span.mean(approx=True, sample_size=4000)
+        self.assertEqual(exact.error, 0)
+        self.assertAlmostEqual(exact.value, float(span.mean()))
+
+    def test_approximate_value_counts(self):
+        """Estimate frequencies of values by sample."""
+        genres = self.schema['tracks']['GenreId']
+        counts = genres.value_counts(top=1, approx=True, sample_size=4000)
+        self.assertEqual(counts.columns, ['GenreId', 'count', 'error'])
+        self.assertEqual(counts.values, [[1, 1297, 0]])
+
+    def test_quantiles(self):
+        """Compute quantiles and median of column."""
+        span = self.schema['tracks']['Milliseconds']
+        self.assertEqual(span.median(), 255634)
+        self.assertEqual(list(span.quantile([0, 0.25, 0.75, 1])),
+                         [1071, 207281, 321645, 5286953])
+        albums = self.schema['albums']
+        ids = albums[albums['AlbumId'] < 5]['AlbumId']
+        self.assertEqual(ids.quantile(0.5), 2.5)
+
+    def test_histogram(self):
+        """Count values in equal-width and explicit bins."""
+        span = self.schema['tracks']['Milliseconds']
+        hist = span.histogram(4)
+        self.assertEqual(hist.columns, ['left', 'right', 'count'])
+        self.assertEqual(hist['count'].values, [3328, 139, 34, 2])
+        self.assertEqual(hist.values[0][0], 1071)
+        self.assertEqual(hist.values[-1][1], 5286953)
+        hist = span.histogram([0, 100000, 300000, 5286953])
+        self.assertEqual(hist['count'].values, [58, 2376, 1069])
+        hist = span.histogram([0, 10 ** 7])
+        self.assertEqual(hist.values, [[0, 10 ** 7, 3503]])
+
+    def test_histogram_bad_bins(self):
+        """Fail to count values in empty or unordered bins."""
+        span = self.schema['tracks']['Milliseconds']
+        for bins in (0, -1, [], [5], [0, 10, 10], [10, 0]):
+            with self.assertRaises(ValueError):
+                span.histogram(bins)
+
+    def test_left_join_elimination(self):
+        """Drop unused left joins on unique keys at compile time."""
+        songs = self.schema['tracks'] \
+            .merge(self.schema['albums']) \
+            .merge(self.schema['artists'].rename({'Name': 'ArtistName'}),
+                   on='ArtistId', how='left')
+        self.assertEqual(
+            songs[['Name', 'ArtistName']].query(),
+            'SELECT tracks.Name, artists.Name AS ArtistName FROM tracks'
+            ' INNER JOIN albums ON tracks.AlbumId=albums.AlbumId'
+            ' LEFT JOIN artists ON albums.ArtistId=artists.ArtistId;'
+        )
+        self.assertEqual(
+            songs[['Name', 'Title']].query(),
+            'SELECT tracks.Name, albums.Title FROM tracks'
+            ' INNER JOIN albums ON tracks.AlbumId=albums.AlbumId;'
+        )
+        self.assertEqual(songs[['Name']].shape, (3503, 1))
+
+    def test_left_join_on_non_unique_key(self):
+        """Keep left join which may multiply rows."""
+        tracks = self.schema['tracks'][['TrackId', 'Name']]
+        playlists = self.schema['playlist_track']
+        self.assertIn('LEFT JOIN playlist_track',
+                      tracks.merge(playlists, how='left')[['Name']].query())
+
+    def test_subquery_pruning(self):
+        """Select only used columns of subquery source."""
+        albums = self.schema['albums']
+        outer = albums.__class__(source=(albums, 'sub'), schema=self.schema)
+        self.assertEqual(
+            outer[['Title']].query(),
+            'SELECT sub.Title FROM (SELECT albums.Title FROM albums) AS sub;'
+        )
+        self.assertEqual(outer[['Title']].iloc[:1].values,
+                         [('For Those About To Rock We Salute You',)])
+
+    def test_map_in_database(self):
+        """Filter and aggregate values mapped by Python function."""
+        tracks = self.schema['tracks']
+        words = tracks['Name'].map(lambda name: len(name.split()))
+        self.assertEqual(tracks[words > 5][['Name']].shape, (257, 1))
+        self.assertEqual(words.max().values, 25)
+
+    def test_user_defined_functions(self):
+        """Call decorated scalar and aggregate functions in database."""
+        tracks = self.schema['tracks']
+
+        @self.schema.scalar_function
+        def scale(value, factor):
+            return value * factor
+
+        @self.schema.aggregate_function
+        class Longest:
+
+            def __init__(self):
+                self.value = ''
+
+            def step(self, value):
+                if len(value or '') > len(self.value):
+                    self.value = value
+
+            def finalize(self):
+                return self.value
+
+        self.assertEqual(scale(tracks['Milliseconds'], 2).sum().values,
+                         2 * tracks['Milliseconds'].sum().values)
+        self.assertEqual(len(Longest(tracks['Name']).values), 123)
+
+    def test_resample_text_timestamps(self):
+        """Aggregate rows by calendar buckets in database."""
+        invoices = self.schema['invoices'][['InvoiceDate', 'Total']]
+        daily = invoices.resample('InvoiceDate', '1d').agg({'Total': 'sum'})
+        self.assertEqual(daily.values[:2], [['2009-01-01 00:00:00', 1.98],
+                                            ['2009-01-02 00:00:00', 3.96]])
+        weekly = invoices.resample('InvoiceDate', '1w').agg(
+            {'invoices': ('Total', 'count')}, fill=True
+        )
+        self.assertEqual(weekly.values[:3], [['2008-12-29 00:00:00', 3],
+                                             ['2009-01-05 00:00:00', 2],
+                                             ['2009-01-12 00:00:00', 0]])
+        self.assertEqual(sum(weekly['invoices'].values), 412)
+
+    def test_pivot_table(self):
+        """Aggregate values by labels of column in one scan."""
+        tracks = self.schema['tracks']
+        pivot = tracks.pivot_table('GenreId', 'MediaTypeId',
+                                   'Milliseconds', aggfunc='max')
+        self.assertEqual(pivot.columns, ['GenreId', '1', '2', '3', '4', '5'])
+        self.assertEqual(pivot.values[1][:3], [2, 907520, None])
+
+    def test_crosstab(self):
+        """Count pairs of values of two series."""
+        from nopandas import crosstab
+
+        tracks = self.schema['tracks']
+        table = crosstab(tracks['GenreId'], tracks['MediaTypeId'])
+        self.assertEqual(table.values[0], [1, 1211, 84, 0, 0, 2])
+        self.assertEqual(sum(sum(row[1:]) for row in table.values), 3503)
+
+    def test_pivot_null_index(self):
+        """Skip rows with NULL index unless it is requested."""
+        from nopandas import crosstab
+
+        tracks = self.schema['tracks']
+        table = crosstab(tracks['Composer'], tracks['MediaTypeId'])
+        self.assertNotIn(None, table['Composer'].values)
+        self.assertEqual(sum(sum(row[1:]) for row in table.values), 2525)
+        table = crosstab(tracks['Composer'], tracks['MediaTypeId'],
+                         dropna=False)
+        self.assertEqual(table.values[0][0], None)
+        self.assertEqual(sum(sum(row[1:]) for row in table.values), 3503)
+        pivot = tracks.pivot_table('Composer', 'MediaTypeId', 'Milliseconds')
+        self.assertNotIn(None, pivot['Composer'].values)
+
+    def test_null_handling(self):
+        """Test and replace NULL values in database."""
+        composer = self.schema['tracks']['Composer']
+        self.assertEqual(composer.isna().sum().values, 978)
+        self.assertEqual(composer.notna().sum().values, 2525)
+        filled = composer.fillna('unknown')
+        self.assertIn("COALESCE(tracks.Composer, 'unknown')", filled.query())
+        self.assertEqual((filled == 'unknown').sum().values, 978)
+
+    def test_conditional_expressions(self):
+        """Clip, cast and replace values by condition in one statement."""
+        tracks = self.schema['tracks']
+        span = tracks['Milliseconds']
+        clipped = span.clip(100000, 300000)
+        self.assertEqual((clipped.min().values, clipped.max().values),
+                         (100000, 300000))
+        self.assertEqual(span.astype(str).query(),
+                         'SELECT CAST(tracks.Milliseconds AS TEXT)'
+                         ' AS Milliseconds FROM tracks;')
+        self.assertEqual(span.astype(float).mean().values,
+                         span.mean().values)
+        rock = span.where(tracks['GenreId'] == 1)
+        self.assertAlmostEqual(rock.mean().values, 283910.0431765613)
+        self.assertEqual(span.where(span > 300000, 0).sum().values,
+                         842572344)
+
+    def test_string_predicates(self):
+        """Filter text values in database."""
+        tracks = self.schema['tracks']
+        name = tracks['Name']
+        self.assertEqual(tracks[name.str.startswith('Love')].shape[0], 27)
+        self.assertEqual(tracks[name.str.contains('Love')].shape[0], 111)
+        self.assertEqual(
+            tracks[name.str.contains("don't", case=False)].shape[0], 28
+        )
+        self.assertEqual(tracks[name.str.contains('50%', case=False)].shape,
+                         (0, 9))
+        self.assertEqual(tracks[name.str.endswith('[*]')].shape, (0, 9))
+        self.assertIn("GLOB '*[[][*]]'", name.str.endswith('[*]').query())
+
+    def test_string_functions(self):
+        """Transform text values in database."""
+        name = self.schema['tracks']['Name']
+        self.assertEqual(name.str.slice(0, 3).values[:2], ('For', 'Bal'))
+        self.assertEqual(name.str.slice(-5, -2).values[0], ' Yo')
+        self.assertEqual(name.str.upper().str.slice(4, 9).values[0], 'THOSE')
+        self.assertEqual(name.str.lower().values[0][:3], 'for')
+        self.assertEqual(name.str.len().max().values, 123)
+
+    def test_multi_key_join(self):
+        """Join on all pairs of keys."""
+        items = self.schema['invoice_items']
+        tracks = self.schema['tracks'][['TrackId', 'UnitPrice', 'Name']]
+        merged = items.merge(tracks, on=['TrackId', 'UnitPrice'])
+        self.assertIn('ON invoice_items.TrackId=tracks.TrackId'
+                      ' AND invoice_items.UnitPrice=tracks.UnitPrice',
+                      merged.query())
+        self.assertEqual(merged.shape, (2240, 6))
+
+    def test_self_join(self):
+        """Alias table which is already joined."""
+        employees = self.schema['employees'][
+            ['EmployeeId', 'LastName', 'ReportsTo']]
+        staff = employees.merge(employees, how='left',
+                                left_on='ReportsTo', right_on='EmployeeId',
+                                suffixes=('', '_manager'))
+        self.assertEqual(staff.columns,
+                         ['EmployeeId', 'LastName', 'ReportsTo',
+                          'EmployeeId_manager', 'LastName_manager',
+                          'ReportsTo_manager'])
+        self.assertEqual(staff[['LastName', 'LastName_manager']].values[:2],
+                         [('Adams', None), ('Edwards', 'Adams')])
+
+    def test_join_suffixes_and_filtered_right(self):
+        """Suffix overlapped columns and keep filter of right frame."""
+        items = self.schema['invoice_items']
+        tracks = self.schema['tracks']
+        merged = items.merge(tracks[tracks['Milliseconds'] > 500000],
+                             on='TrackId')
+        self.assertIn('UnitPrice_x', merged.columns)
+        self.assertIn('UnitPrice_y', merged.columns)
+        self.assertEqual(merged.shape, (190, 13))
+
 
 class TestBasicSQLiteFunctionality(unittest.TestCase, TestBacisFunctionality):
     """Test api with SQLite database."""
@@ -152,3 +503,769 @@ class TestBasicSQLiteFunctionality(unittest.TestCase, TestBacisFunctionality):
 
         conn = sqlite3.connect(self.PATH_TO_SQLITE_DUMP)
         self.schema = Schema(conn)
+
+
+class TestSQLiteWriting(unittest.TestCase):
+    """Test writing to in-memory copy of SQLite database."""
+
+    def setUp(self):
+        """Copy sample database to memory."""
+        import sqlite3
+        from nopandas.sqlite import Schema
+
+        path = TestBasicSQLiteFunctionality.PATH_TO_SQLITE_DUMP
+        conn = sqlite3.connect(path)
+        self.conn = sqlite3.connect(':memory:')
+        conn.backup(self.conn)
+        conn.close()
+        self.schema = Schema(self.conn)
+
+    def test_from_records(self):
+        """Write records into new table."""
+        rows = [(i, 'name%s' % i) for i in range(25)]
+        qdf = self.schema.from_records('names', rows, ['id', 'name'],
+                                       types=['INTEGER', 'TEXT'],
+                                       batch_size=10)
+        self.assertEqual(qdf.shape, (25, 2))
+        self.assertEqual(qdf.iloc[3:4].values, [(3, 'name3')])
+
+    def test_from_records_existed_table(self):
+        """Fail, append and replace existed table."""
+        self.schema.from_records('numbers', [(1,), (2,)], ['n'])
+        with self.assertRaisesRegex(ValueError, 'already exists'):
+            self.schema.from_records('numbers', [(3,)], ['n'])
+
+        qdf = self.schema.from_records('numbers', [(3,)], ['n'],
+                                       if_exists='append')
+        self.assertEqual(qdf.shape, (3, 1))
+        qdf = self.schema.from_records('numbers', [(4,)], ['n'],
+                                       if_exists='replace')
+        self.assertEqual(qdf.values, [(4,)])
+
+    def test_from_records_rollback(self):
+        """Keep original table if writing of records fails."""
+        self.schema.from_records('items', [(1, 'a'), (2, 'b')],
+                                 ['id', 'name'])
+        with self.assertRaises(Exception):
+            self.schema.from_records('items', [(3, 'c'), (4,)],
+                                     ['id', 'name'], if_exists='replace')
+
+        self.assertEqual(self.schema['items'].values, [(1, 'a'), (2, 'b')])
+        with self.assertRaises(Exception):
+            self.schema.from_records('other', [(1,), (2, 3)], ['id'])
+
+        self.assertNotIn('other', self.schema.tables)
+
+    def test_to_table_in_engine(self):
+        """Copy selection into table of same database."""
+        tracks = self.schema['tracks']
+        long_tracks = tracks[tracks['Milliseconds'] > 1000000]
+        qdf = long_tracks[['TrackId', 'Name']].to_table('long_tracks')
+        self.assertEqual(qdf.columns, ['TrackId', 'Name'])
+        self.assertEqual(qdf.shape[0], long_tracks.shape[0])
+
+        long_tracks[['TrackId', 'Name']].to_table('long_tracks',
+                                                  if_exists='append')
+        self.assertEqual(qdf.shape[0], 2 * long_tracks.shape[0])
+
+    def test_to_table_other_connection(self):
+        """Copy selection into table of other database."""
+        import sqlite3
+        from nopandas.sqlite import Schema
+
+        target = Schema(sqlite3.connect(':memory:'))
+        albums = self.schema['albums']
+        qdf = albums.to_table('albums', schema=target, batch_size=100)
+        self.assertEqual(qdf.shape, albums.shape)
+        self.assertEqual(qdf.iloc[2:3].values, albums.iloc[2:3].values)
+
+
+class TestSQLiteExport(unittest.TestCase):
+    """Test export of SQLite relations to files."""
+
+    def setUp(self):
+        """Create connection to DB and temporary directory."""
+        import sqlite3
+        import tempfile
+        from nopandas.sqlite import Schema
+
+        path = TestBasicSQLiteFunctionality.PATH_TO_SQLITE_DUMP
+        self.schema = Schema(sqlite3.connect(path))
+        self.tmpdir = tempfile.TemporaryDirectory()
+
+    def tearDown(self):
+        """Remove temporary directory."""
+        self.tmpdir.cleanup()
+
+    def test_to_csv_buffer(self):
+        """Write CSV into opened file."""
+        import io
+
+        buffer = io.StringIO()
+        self.schema['albums'].iloc[:2].to_csv(buffer, batch_size=1)
+        self.assertEqual(
+            buffer.getvalue().splitlines(),
+            ['AlbumId,Title,ArtistId',
+             '1,For Those About To Rock We Salute You,1',
+             '2,Balls to the Wall,2']
+        )
+
+    def test_to_csv_gzip(self):
+        """Write compressed CSV inferred by extension."""
+        import csv
+        import gzip
+
+        path = os.path.join(self.tmpdir.name, 'albums.csv.gz')
+        self.schema['albums'].to_csv(path)
+        with gzip.open(path, 'rt', newline='') as file:
+            rows = list(csv.reader(file))
+
+        self.assertEqual(rows[0], ['AlbumId', 'Title', 'ArtistId'])
+        self.assertEqual(len(rows), 348)
+
+    def test_to_jsonl(self):
+        """Write JSON Lines file."""
+        import json
+
+        path = os.path.join(self.tmpdir.name, 'albums.jsonl')
+        self.schema['albums'].rename({'Title': 'title'}).to_jsonl(path)
+        with open(path) as file:
+            rows = [json.loads(line) for line in file]
+
+        self.assertEqual(len(rows), 347)
+        self.assertEqual(rows[1],
+                         {'AlbumId': 2, 'title': 'Balls to the Wall',
+                          'ArtistId': 2})
+
+    def test_to_jsonl_blobs(self):
+        """Write blobs to JSON Lines as base64 strings."""
+        import base64
+        import io
+        import json
+        import sqlite3
+        from nopandas.sqlite import Schema
+
+        schema = Schema(sqlite3.connect(':memory:'))
+        files = schema.from_records('files', [(1, b'\x00\xffdata'), (2, None)],
+                                    ['id', 'content'])
+        buffer = io.StringIO()
+        files.to_jsonl(buffer)
+        rows = [json.loads(line) for line in buffer.getvalue().splitlines()]
+        self.assertEqual(base64.b64decode(rows[0]['content']),
+                         b'\x00\xffdata')
+        self.assertIsNone(rows[1]['content'])
+
+    def test_to_csv_blobs(self):
+        """Write blobs to CSV as base64 strings."""
+        import base64
+        import csv
+        import io
+        import sqlite3
+        from nopandas.sqlite import Schema
+
+        schema = Schema(sqlite3.connect(':memory:'))
+        files = schema.from_records('files', [(1, b'\x00\xffdata'), (2, None)],
+                                    ['id', 'content'])
+        buffer = io.StringIO()
+        files.to_csv(buffer)
+        rows = list(csv.reader(io.StringIO(buffer.getvalue())))
+        self.assertEqual(base64.b64decode(rows[1][1]), b'\x00\xffdata')
+        self.assertEqual(rows[2], ['2', ''])
+
+
+class TestSQLiteImport(unittest.TestCase):
+    """Test import of files into SQLite database."""
+
+    def setUp(self):
+        """Create empty database and temporary directory."""
+        import sqlite3
+        import tempfile
+        from nopandas.sqlite import Schema
+
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.conn = sqlite3.connect(os.path.join(self.tmpdir.name, 'db'))
+        self.schema = Schema(self.conn)
+
+    def tearDown(self):
+        """Remove temporary directory."""
+        self.conn.close()
+        self.tmpdir.cleanup()
+
+    def test_read_csv(self):
+        """Load CSV file with type inference."""
+        import gzip
+
+        path = os.path.join(self.tmpdir.name, 'items.csv.gz')
+        with gzip.open(path, 'wt') as file:
+            file.write('id,price,name\n1,2.5,a\n2,,b\n3,4,\n')
+
+        qdf = self.schema.read_csv(path, batch_size=2)
+        self.assertEqual(qdf.query(), 'SELECT * FROM items;')
+        self.assertEqual(qdf.values, [(1, 2.5, 'a'), (2, None, 'b'),
+                                      (3, 4.0, None)])
+        self.assertEqual(
+            self.schema.fetchall('PRAGMA journal_mode;')[0][0],
+            'delete'
+        )
+
+    def test_read_csv_rollback(self):
+        """Keep replaced table if loading fails after type sample."""
+        path = os.path.join(self.tmpdir.name, 'items.csv')
+        with open(path, 'w') as file:
+            file.write('id,name\n1,a\n2,b\n3\n')
+
+        self.schema.from_records('items', [(7, 'x')], ['id', 'name'])
+        with self.assertRaises(Exception):
+            self.schema.read_csv(path, sample_size=1, batch_size=1,
+                                 if_exists='replace')
+
+        self.assertEqual(self.schema['items'].values, [(7, 'x')])
+        self.assertEqual(
+            self.schema.fetchall('PRAGMA journal_mode;')[0][0],
+            'delete'
+        )
+
+    def test_read_csv_round_trip(self):
+        """Load exported CSV back to database."""
+        import io
+        import sqlite3
+        from nopandas.sqlite import Schema
+
+        path = TestBasicSQLiteFunctionality.PATH_TO_SQLITE_DUMP
+        albums = Schema(sqlite3.connect(path))['albums']
+        buffer = io.StringIO()
+        albums.to_csv(buffer)
+        buffer.seek(0)
+        qdf = self.schema.read_csv(buffer, table='albums', sample_size=10)
+        self.assertEqual(qdf.shape, albums.shape)
+        self.assertEqual(qdf.iloc[5:9].values, albums.iloc[5:9].values)
+
+
+class TestSQLiteShards(unittest.TestCase):
+    """Test queries across attached SQLite databases."""
+
+    def setUp(self):
+        """Create main database with users and two shards of events."""
+        import sqlite3
+        import tempfile
+        from nopandas.sqlite import Schema
+
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.conn = sqlite3.connect(':memory:')
+        self.schema = Schema(self.conn)
+        self.schema.from_records('users', [(1, 'ann'), (2, 'bob')],
+                                 columns=['user', 'name'])
+        for month, rows in [('m01', [(1, 10), (2, 5)]),
+                            ('m02', [(1, 7), (1, 3), (2, 1)])]:
+            path = os.path.join(self.tmpdir.name, month + '.db')
+            shard = Schema(sqlite3.connect(path))
+            shard.from_records('events', rows, columns=['user', 'amount'],
+                               types=['INTEGER', 'INTEGER'])
+            shard.conn.close()
+            self.schema.attach(path, month)
+
+    def tearDown(self):
+        """Remove temporary directory."""
+        self.conn.close()
+        self.tmpdir.cleanup()
+
+    def test_attached_tables(self):
+        """List, describe and query tables of attached databases."""
+        self.assertEqual(list(self.schema.tables),
+                         ['users', 'm01.events', 'm02.events'])
+        self.assertEqual(self.schema.declared_types('m01.events'),
+                         {'user': 'INTEGER', 'amount': 'INTEGER'})
+        self.assertEqual(self.schema['m02.events']['amount'].sum(), 11)
+
+    def test_join_attached_tables(self):
+        """Join tables of same name from two attached databases."""
+        events = self.schema['m01.events'].merge(self.schema['m02.events'],
+                                                 on='user')
+        self.assertIn('INNER JOIN m02.events AS a ON m01.events.user=a.user',
+                      events.query())
+        self.assertEqual(events['amount_y'].sum(), 21)
+
+    def test_union_shards(self):
+        """Union shard tables and join them with main table."""
+        events = self.schema.union_shards(['m01.events', 'm02.events'])
+        self.assertEqual(events.shape, (5, 2))
+        users = events.merge(self.schema['users'])
+        bob = users[users['name'] == 'bob']
+        self.assertEqual(bob['amount'].sum(), 6)
+        self.schema.detach('m02')
+        self.assertEqual(list(self.schema.tables), ['users', 'm01.events'])
+
+
+class TestSQLiteIncremental(unittest.TestCase):
+    """Test incremental refresh of results by new rows."""
+
+    def setUp(self):
+        """Create table of events."""
+        import sqlite3
+        from nopandas.sqlite import Schema
+
+        self.schema = Schema(sqlite3.connect(':memory:'))
+        self.events = self.schema.from_records(
+            'events', [(1, 10), (2, 5), (1, None)],
+            columns=['user', 'amount']
+        )
+
+    def append(self, *rows):
+        """Append rows to table of events."""
+        self.schema.from_records('events', rows, columns=['user', 'amount'],
+                                 if_exists='append')
+
+    def test_incremental_rows(self):
+        """Accumulate new rows of row-wise query."""
+        events = self.events
+        result = events[events['user'] == 1].incremental()
+        self.assertEqual(result.values, [(1, 10), (1, None)])
+        self.append((1, 7), (2, 1))
+        self.assertEqual(result.refresh(), 1)
+        self.assertEqual(result.mark, 4)
+        self.assertEqual(result.values, [(1, 10), (1, None), (1, 7)])
+
+    def test_incremental_aggregates(self):
+        """Merge partial aggregates of new rows."""
+        amount = self.events['amount']
+        total = amount.sum().incremental()
+        mean = amount.mean().incremental()
+        self.assertEqual((total.values, mean.values), (15, 7.5))
+        self.append((3, 3), (3, None))
+        self.assertEqual(mean.refresh(), 2)
+        self.assertEqual(mean.mark, 5)
+        self.assertEqual(mean.values, 6)
+        total.refresh()
+        self.assertEqual(total.values, 18)
+        self.assertEqual(total.refresh(), 0)
+        self.assertEqual(total.values, 18)
+
+    def test_incremental_by_key(self):
+        """Refresh by user key and reject window queries."""
+        result = self.events['user'].max().incremental(key='user')
+        self.assertEqual((result.values, result.mark), (2, 2))
+        with self.assertRaises(ValueError):
+            self.events['user'].cumsum().incremental()
+
+
+class TestSQLiteResultCache(unittest.TestCase):
+    """Test persistent columnar cache of query results."""
+
+    def setUp(self):
+        """Create database file and cache directory."""
+        import tempfile
+        from nopandas.cache import ResultCache
+        from nopandas.sqlite import Schema
+
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.schema = Schema.open(os.path.join(self.tmpdir.name, 'db'))
+        self.schema.from_records(
+            'items',
+            [(1, 'a', 1.5, b'x'), (None, 'b\xe9', None, b''),
+             (3, None, 2, None)],
+            columns=['id', 'name', 'price', 'data']
+        )
+        self.cache = ResultCache(os.path.join(self.tmpdir.name, 'cache'),
+                                 batch_size=2)
+
+    def tearDown(self):
+        """Remove temporary directory."""
+        self.schema.conn.close()
+        self.tmpdir.cleanup()
+
+    def test_fetch_result(self):
+        """Fetch result to columnar file and read it back."""
+        items = self.schema['items']
+        with self.cache.fetch(items) as result:
+            self.assertEqual(result.columns, items.columns)
+            self.assertEqual(result.values, items.values)
+            self.assertEqual(result['name'][1], 'b\xe9')
+            self.assertEqual(result['price'].values[:2], [1.5, None])
+            self.assertEqual(result.to_table()['id'].values, [1, None, 3])
+
+    def test_reuse_until_data_changed(self):
+        """Reuse cached result until data of database changes."""
+        items = self.schema['items']
+        with self.cache.fetch(items) as first, \
+                self.cache.fetch(items) as second:
+            key = first.key
+            self.assertEqual(second.key, key)
+
+        self.schema.from_records('items', [('x', 0, 0, 0)],
+                                 columns=['id', 'name', 'price', 'data'],
+                                 if_exists='append')
+        with self.cache.fetch(items) as result:
+            self.assertNotEqual(result.key, key)
+            self.assertEqual(result['id'].values[-1], 'x')
+            self.assertEqual(result['id'][0], 1)
+
+    def test_databases_in_memory(self):
+        """Distinguish results of databases in memory with same changes."""
+        import sqlite3
+        from nopandas.sqlite import Schema
+
+        keys = []
+        for value in ('a', 'b'):
+            schema = Schema(sqlite3.connect(':memory:'))
+            items = schema.from_records('items', [(value,)], ['name'])
+            keys.append(self.cache.key(items))
+            schema.conn.close()
+
+        self.assertNotEqual(keys[0], keys[1])
+
+
+class TestSQLiteReadSession(unittest.TestCase):
+    """Test evaluation of queries in one read transaction."""
+
+    def setUp(self):
+        """Create database in WAL mode and other writing connection."""
+        import sqlite3
+        import tempfile
+        from nopandas.sqlite import Schema
+
+        self.tmpdir = tempfile.TemporaryDirectory()
+        path = os.path.join(self.tmpdir.name, 'db')
+        self.schema = Schema.open(path, profile='analytics')
+        self.schema.from_records('events', [(1,), (2,)], columns=['id'])
+        self.writer = Schema(sqlite3.connect(path))
+
+    def tearDown(self):
+        """Close connections and remove temporary directory."""
+        self.writer.conn.close()
+        self.schema.conn.close()
+        self.tmpdir.cleanup()
+
+    def test_snapshot(self):
+        """Read same snapshot while other connection writes."""
+        events = self.schema['events']
+        with self.schema.read_session():
+            self.assertEqual(events.shape, (2, 1))
+            self.writer.from_records('events', [(3,)], columns=['id'],
+                                     if_exists='append')
+            self.assertEqual(events['id'].sum().values, 3)
+            with self.schema.read_session():
+                self.assertEqual(len(events.values), 2)
+
+        self.assertEqual(events.shape, (3, 1))
+
+    def test_session_cache(self):
+        """Fetch catalog and counts once per session."""
+        events = self.schema['events']
+        with self.schema.read_session():
+            events.shape
+            self.assertIn('SELECT COUNT(*) FROM (SELECT * FROM events);',
+                          self.schema._session)
+            self.assertEqual(self.schema.tables.values, ['events'])
+
+        self.assertIsNone(self.schema._session)
+
+    def test_read_only(self):
+        """Refuse writes by schema and roll back other changes."""
+        with self.schema.read_session():
+            with self.assertRaisesRegex(ValueError, 'read session'):
+                self.schema.from_records('events', [(3,)], columns=['id'],
+                                         if_exists='append')
+
+            self.schema.conn.execute('INSERT INTO events VALUES (4);')
+
+        self.assertEqual(self.schema['events']['id'].values, (1, 2))
+
+
+class TestSQLiteResample(unittest.TestCase):
+    """Test time buckets of epoch timestamps."""
+
+    def setUp(self):
+        """Create table of events with epoch milliseconds."""
+        import sqlite3
+        from nopandas.sqlite import Schema
+
+        self.schema = Schema(sqlite3.connect(':memory:'))
+        self.events = self.schema.from_records(
+            'events', [(1000, 1), (3599000, 2), (7300000, 3), (None, 4)],
+            columns=['ts', 'value']
+        )
+
+    def test_resample_epoch(self):
+        """Aggregate epoch milliseconds by hours with filled gaps."""
+        hourly = self.events.resample('ts', '1h', unit='ms')
+        self.assertEqual(hourly.size().values, [[0, 2], [7200, 1]])
+        self.assertEqual(
+            hourly.agg({'value': 'sum', 'top': ('value', 'max')},
+                       fill=True).values,
+            [[0, 3, 2], [3600, 0, None], [7200, 3, 3]]
+        )
+
+    def test_unknown_frequency(self):
+        """Fail to resample by unknown frequency."""
+        with self.assertRaises(ValueError):
+            self.events.resample('ts', '1y')
+
+
+class TestSQLiteStringMethods(unittest.TestCase):
+    """Test usage of indices by string predicates."""
+
+    def setUp(self):
+        """Create indexed table of words."""
+        import sqlite3
+        from nopandas.sqlite import Schema
+
+        self.schema = Schema(sqlite3.connect(':memory:'))
+        self.words = self.schema.from_records(
+            'words', [('apple',), ('apricot',), ('banana',), ('Apex',)],
+            columns=['word']
+        )
+        self.schema.fetchall('CREATE INDEX words_word ON words(word);')
+
+    def test_prefix_uses_index(self):
+        """Search prefix by range over index of column."""
+        words = self.words
+        prefixed = words[words['word'].str.startswith('ap')]
+        self.assertEqual(prefixed.values, [('apple',), ('apricot',)])
+        plan = self.schema.fetchall('EXPLAIN QUERY PLAN ' + prefixed.query())
+        self.assertIn('USING COVERING INDEX words_word', plan[0][-1])
+
+
+class TestSQLiteFullText(unittest.TestCase):
+    """Test full-text index and search."""
+
+    def setUp(self):
+        """Create table of songs with full-text index."""
+        import sqlite3
+        from nopandas.sqlite import Schema
+
+        self.schema = Schema(sqlite3.connect(':memory:'))
+        self.songs = self.schema.from_records(
+            'songs',
+            [('Love Me Do', 'Lennon'), ('Real Love', 'Lennon'),
+             ('Help', 'Lennon'), ('Love Love Love', None)],
+            columns=['title', 'author']
+        )
+        self.schema.create_fulltext_index('songs', ['title', 'author'])
+
+    def test_search(self):
+        """Search rows by relevance in full-text index."""
+        found = self.songs.search('love', limit=2)
+        self.assertIn('bm25(songs_fts)', found.query())
+        self.assertEqual(found.columns, ['title', 'author', 'score'])
+        self.assertIn('Love Love Love', found['title'].values)
+        self.assertEqual(found.shape, (2, 3))
+
+    def test_match_column(self):
+        """Match full-text query in one column."""
+        songs = self.songs
+        self.assertEqual(songs[songs['title'].str.match('love')].shape[0], 3)
+        self.assertEqual(songs[songs['author'].str.match('love')].shape[0], 0)
+
+    def test_index_in_sync(self):
+        """Keep index in sync by triggers on changes of table."""
+        songs = self.songs
+        self.schema.from_records('songs', [('Lovely Rita', 'McCartney')],
+                                 columns=['title', 'author'],
+                                 if_exists='append')
+        with self.schema.transaction() as cursor:
+            cursor.execute("UPDATE songs SET author = 'Lennon'"
+                           " WHERE title = 'Love Love Love';")
+            cursor.execute("DELETE FROM songs WHERE title = 'Help';")
+
+        self.assertEqual(songs.search('lovely')['title'].values,
+                         'Lovely Rita')
+        self.assertEqual(songs.search('lennon').shape[0], 3)
+        self.assertEqual(songs.search('help').shape[0], 0)
+
+    def test_search_order(self):
+        """Order matches by relevance after filtering and merging."""
+        songs = self.songs
+        found = songs.search('love')
+        scores = found['score'].values
+        self.assertEqual(list(scores), sorted(scores))
+        self.assertEqual(found['title'].values[0], 'Love Love Love')
+        lennon = found[found['author'] == 'Lennon']
+        self.assertEqual(lennon['title'].values, ('Real Love', 'Love Me Do'))
+        authors = self.schema.from_records('authors', [('Lennon', 1940)],
+                                           columns=['author', 'born'])
+        merged = found.merge(authors, on='author')
+        self.assertEqual(merged['title'].values, ('Real Love', 'Love Me Do'))
+
+    def test_search_merged_frame(self):
+        """Fail to search frame without single source table."""
+        authors = self.schema.from_records('authors', [('Lennon', 1940)],
+                                           columns=['author', 'born'])
+        merged = self.songs.merge(authors, on='author')
+        with self.assertRaisesRegex(ValueError, 'single table'):
+            merged.search('love')
+
+        with self.assertRaisesRegex(ValueError, 'single table'):
+            merged['title'].str.match('love')
+
+    def test_index_tables(self):
+        """Hide index tables and roll back failed index creation."""
+        self.assertEqual(list(self.schema.tables), ['songs'])
+        with self.assertRaises(Exception):
+            self.schema.create_fulltext_index('songs', ['year'],
+                                              name='years')
+
+        self.assertNotIn('years', self.schema._master['name'])
+
+
+class TestSQLiteEstimate(unittest.TestCase):
+    """Test estimation of result size and guard of large results."""
+
+    def setUp(self):
+        """Create connection to DB."""
+        import sqlite3
+        from nopandas.sqlite import Schema
+
+        self.schema = Schema(sqlite3.connect(
+            TestBasicSQLiteFunctionality.PATH_TO_SQLITE_DUMP
+        ))
+        self.tracks = self.schema['tracks']
+
+    def test_estimate_rows(self):
+        """Estimate rows by query plan and table statistics."""
+        tracks = self.tracks
+        self.assertEqual(tracks.estimate().rows, 3503)
+        self.assertEqual(tracks[tracks['TrackId'] == 5].estimate().rows, 1)
+        self.assertEqual(tracks[tracks['AlbumId'] == 3].estimate().rows, 11)
+        self.assertEqual(tracks.iloc[:10].estimate().rows, 10)
+        self.assertEqual(tracks['Milliseconds'].sum().estimate().rows, 1)
+        merged = tracks.merge(self.schema['albums'], on='AlbumId')
+        self.assertEqual(merged.estimate().rows, 347 * 11)
+
+    def test_estimate_bytes(self):
+        """Estimate memory of rows by sampled values."""
+        tracks = self.tracks
+        rows, size = tracks.estimate()
+        self.assertGreater(size, rows * tracks.shape[1] * 8)
+        self.assertLess(tracks['TrackId'].estimate().bytes, size)
+
+    def test_guard(self):
+        """Refuse or stream result over memory budget."""
+        tracks = self.tracks
+        self.schema.max_result_bytes = 100000
+        with self.assertRaises(ValueError):
+            tracks.values
+
+        small = tracks[tracks['AlbumId'] == 3]
+        self.assertEqual(len(small.values), 3)
+        self.schema.large_result = 'stream'
+        self.assertEqual(len(list(tracks.values)), 3503)
+        self.assertEqual(next(tracks['Name'].values),
+                         'For Those About To Rock (We Salute You)')
+        with self.assertRaises(ValueError):
+            self.schema.large_result = 'ignore'
+
+
+class TestSQLiteProfiles(unittest.TestCase):
+    """Test opening SQLite database with pragma profiles."""
+
+    def test_readonly_analytics(self):
+        """Open sample database read-only with analytics profile."""
+        from nopandas.sqlite import Schema
+
+        schema = Schema.open(TestBasicSQLiteFunctionality.PATH_TO_SQLITE_DUMP,
+                             profile='analytics', readonly=True)
+        pragmas = dict(schema.pragmas().values)
+        self.assertEqual(pragmas['mmap_size'], 268435456)
+        self.assertEqual(pragmas['cache_size'], -262144)
+        self.assertEqual(pragmas['temp_store'], 2)
+        self.assertEqual(pragmas['journal_mode'], 'delete')
+        self.assertEqual(schema['albums'].shape, (347, 3))
+        with self.assertRaisesRegex(Exception, 'readonly'):
+            schema.from_records('numbers', [(1,)], ['n'])
+
+    def test_override_profile(self):
+        """Open database with overridden pragma of profile."""
+        import tempfile
+        from nopandas.sqlite import Schema
+
+        with tempfile.TemporaryDirectory() as tmpdir:
+            schema = Schema.open(os.path.join(tmpdir, 'db'),
+                                 profile='bulk_load', cache_size=-1024)
+            pragmas = dict(schema.pragmas().values)
+            schema.conn.close()
+
+        self.assertEqual(pragmas['journal_mode'], 'memory')
+        self.assertEqual(pragmas['synchronous'], 0)
+        self.assertEqual(pragmas['cache_size'], -1024)
+
+    def test_unknown_profile(self):
+        """Fail on unknown profile name."""
+        from nopandas.sqlite import Schema
+
+        with self.assertRaisesRegex(ValueError, 'unknown profile'):
+            Schema.open(':memory:', profile='fast')
+
+
+class TestSQLiteWindowFunctions(unittest.TestCase):
+    """Test window functions over small SQLite table."""
+
+    def setUp(self):
+        """Create table with groups, ties and NULL."""
+        import sqlite3
+        from nopandas.sqlite import Schema
+
+        self.schema = Schema(sqlite3.connect(':memory:'))
+        self.qdf = self.schema.from_records(
+            'points',
+            [(1, 'a', 10), (2, 'a', 20), (3, 'a', 20),
+             (4, 'b', None), (5, 'b', 5), (6, 'b', 7)],
+            ['id', 'grp', 'val'],
+            types=['INTEGER PRIMARY KEY', 'TEXT', 'INTEGER']
+        )
+
+    def fetch(self, series):
+        """Return values of series with id ordered by id."""
+        qdf = self.qdf.copy_with(attrs=dict(self.qdf['id']._attrs,
+                                            **series._attrs))
+        return [value for _, value in sorted(qdf.values)]
+
+    def test_cumsum(self):
+        """Compute cumulative sum within groups."""
+        val = self.qdf['val']
+        self.assertEqual(self.fetch(val.cumsum()),
+                         [10, 30, 50, 50, 55, 62])
+        self.assertEqual(self.fetch(val.cumsum(groupby=self.qdf['grp'])),
+                         [10, 30, 50, None, 5, 12])
+
+    def test_filter_by_window(self):
+        """Filter rows by condition over window function."""
+        qdf = self.qdf
+        cumsum = qdf['val'].cumsum()
+        self.assertEqual(qdf[cumsum > 40]['id'].values, (3, 4, 5, 6))
+        self.assertEqual(cumsum[cumsum > 52].values, (55, 62))
+        first = qdf[qdf['grp'] == 'b']
+        running = first['val'].cumsum()
+        self.assertEqual(first[running > 4]['id'].values, (5, 6))
+
+    def test_shift_and_diff(self):
+        """Shift values and compute differences."""
+        val = self.qdf['val']
+        self.assertEqual(self.fetch(val.shift()),
+                         [None, 10, 20, 20, None, 5])
+        self.assertEqual(self.fetch(val.shift(-1, groupby=self.qdf['grp'])),
+                         [20, 20, None, 5, 7, None])
+        self.assertEqual(self.fetch(val.diff(by=self.qdf['id'])),
+                         [None, 10, 0, None, None, 2])
+
+    def test_rank(self):
+        """Rank values with ties and NULL."""
+        val = self.qdf['val']
+        self.assertEqual(self.fetch(val.rank()),
+                         [3, 4.5, 4.5, None, 1, 2])
+        self.assertEqual(self.fetch(val.rank('min')), [3, 4, 4, None, 1, 2])
+        self.assertEqual(self.fetch(val.rank('max')), [3, 5, 5, None, 1, 2])
+        self.assertEqual(self.fetch(val.rank('dense')),
+                         [3, 4, 4, None, 1, 2])
+        self.assertEqual(
+            self.fetch(val.rank('first', ascending=False,
+                                groupby=self.qdf['grp'])),
+            [3, 1, 2, None, 2, 1]
+        )
+
+    def test_rolling(self):
+        """Compute moving aggregates."""
+        val = self.qdf['val']
+        self.assertEqual(self.fetch(val.rolling(2).sum()),
+                         [None, 30, 40, None, None, 12])
+        self.assertEqual(self.fetch(val.rolling(2, min_periods=1).mean()),
+                         [10, 15, 20, 20, 5, 6])
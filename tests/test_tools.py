@@ -0,0 +1,58 @@
+"""Unit tests for tools module."""
+
+import unittest
+
+from nopandas.tools import Table
+
+
+class TestTableRelations(unittest.TestCase):
+    """Test relational operations of in-memory Table."""
+
+    def setUp(self):
+        """Create tables of tracks and albums."""
+        self.tracks = Table((1, 'Intro', 10, 0.99),
+                            (2, 'Outro', 10, 1.99),
+                            (3, 'Single', None, 0.99),
+                            (4, 'Bonus', 20, 1.99),
+                            columns=['id', 'name', 'album', 'price'])
+        self.albums = Table((10, 'First'),
+                            (30, 'Lost'),
+                            columns=['album', 'title'])
+
+    def test_inner_merge(self):
+        """Merge tables by key keeping matched rows."""
+        merged = self.tracks.merge(self.albums, on='album')
+        self.assertEqual(merged.columns,
+                         ['id', 'name', 'album', 'price', 'title'])
+        self.assertEqual(merged['title'].values, ['First', 'First'])
+
+    def test_outer_merge(self):
+        """Merge tables by key keeping rows of both sides."""
+        merged = self.tracks.merge(self.albums, on='album', how='outer')
+        self.assertEqual(merged['id'].values, [1, 2, 3, 4, None])
+        self.assertEqual(merged['album'].values, [10, 10, None, 20, 30])
+        self.assertEqual(merged['title'].values,
+                         ['First', 'First', None, None, 'Lost'])
+
+    def test_merge_suffixes(self):
+        """Suffix overlapped column labels of merged tables."""
+        merged = self.tracks.merge(self.tracks, on='id')
+        self.assertIn('name_x', merged.columns)
+        self.assertIn('name_y', merged.columns)
+
+    def test_sort_values(self):
+        """Sort rows by columns in mixed directions with nulls last."""
+        tracks = self.tracks.sort_values(['album', 'price'],
+                                         ascending=[False, True])
+        self.assertEqual(tracks['id'].values, [4, 1, 2, 3])
+
+    def test_groupby_agg(self):
+        """Aggregate groups by names of functions and callables."""
+        groups = self.tracks.groupby('price').agg({
+            'tracks': ('id', 'count'),
+            'album': 'max',
+            'names': ('name', lambda values: ','.join(values)),
+        })
+        self.assertEqual(groups.columns, ['price', 'tracks', 'album', 'names'])
+        self.assertEqual(groups.values, [[0.99, 2, 10, 'Intro,Single'],
+                                         [1.99, 2, 20, 'Outro,Bonus']])